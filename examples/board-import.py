@@ -39,8 +39,7 @@ def main():
     # planned Work Labels
     # Planning is something that needs to be reviewed by PM/UA/TC
     # Planned is confirmed work for the cycle
-    board_manager.add_labels_by_color("yellow", ["Planning"])
-    board_manager.add_labels_by_color("yellow", ["Planned"])
+    board_manager.add_labels_by_color("yellow", ["Planning", "Planned"])
 
     board_manager.import_cards()
 
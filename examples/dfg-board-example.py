@@ -82,19 +82,17 @@ def main():
     # yellow, purple, blue, red, green, orange,
     # black, sky, pink, lime, null
 
-    # Warning Status Labels (Red)
-    # These labels denote something impeding progress
-    board_manager.add_labels_by_color("red",
-                                      ['UNTRIAGED', 'BLOCKED', 'CI-BLOCKED'])
-    # Type Labels (Black)
-    board_manager.add_labels_by_color("black", ["RFE", "Bug"])
-
-    # Unplanned Work Labels (Orange)
-    board_manager.add_labels_by_color("orange", ["Unplanned"])
-
-    # Sprint Labels (Purple)
-    board_manager.add_labels_by_color("purple", ["Sprint 1", "Sprint 2",
-                                                 "Sprint 3", "Sprint 4"])
+    board_manager.add_labels({
+        # Warning Status Labels (Red)
+        # These labels denote something impeding progress
+        "red": ['UNTRIAGED', 'BLOCKED', 'CI-BLOCKED'],
+        # Type Labels (Black)
+        "black": ["RFE", "Bug"],
+        # Unplanned Work Labels (Orange)
+        "orange": ["Unplanned"],
+        # Sprint Labels (Purple)
+        "purple": ["Sprint 1", "Sprint 2", "Sprint 3", "Sprint 4"],
+    })
 
     # add the sources of external artifacts
     board_manager.sources.append(bug_backlog)
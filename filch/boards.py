@@ -20,35 +20,103 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import collections
-import itertools
+from concurrent import futures
 import json
 import os
 
 from launchpadlib.launchpad import Launchpad
-import requests
+from trello import board as trelloboard
+from trello import exceptions as trello_exceptions
 from trello import trelloclient
 
+from filch import comments
 from filch import constants
 from filch import data
 from filch import exceptions as peeves
+from filch import executor
+from filch import labels
+from filch import metrics
+from filch import mutations
+from filch import planner
+from filch import ratelimit
+from filch import snapshot
+from filch import state
+from filch import transport
 from filch import utils
 
 
-def get_or_create_board(config, name):
-    trello_api = trelloclient.TrelloClient(
-        api_key=config['trello']['api_key'],
-        token=config['trello']['access_token']
-    )
-    boards = trello_api.list_boards()
-    board_filter = [b for b in boards if b.name == name]
+def _board_key(name):
+    return 'trello-board|%s' % name
+
+
+def find_board(client, name, sync_state, create=False):
+    """ Resolves a board name to a Trello Board
+
+    The id of the board is cached in the sync state.  A cached board is
+    returned without making a request, so the id is only checked by the
+    first request made for the board (see load_board).  Otherwise every
+    board the token can see is listed once to find it.
+
+    :param client: TrelloClient
+    :param name: name of the board
+    :param sync_state: SyncState the id is cached in
+    :param create: create the board if there is none with the name
+    :return: Trello Board Object, or None
+    """
+    board_id = sync_state.get_mark(_board_key(name))
+    if board_id:
+        return trelloboard.Board(client=client, board_id=board_id, name=name)
+    board_filter = [b for b in client.list_boards() if b.name == name]
     if len(board_filter) > 0:
         board = board_filter[0]
-    else:
-        board = trello_api.add_board(name)
+    elif create:
+        board = client.add_board(name)
         board.open()
+    else:
+        return None
+    sync_state.set_mark(_board_key(name), board.id)
     return board
 
 
+def forget_board(sync_state, name):
+    sync_state.set_mark(_board_key(name), None)
+
+
+def load_board(client, name, sync_state, load, create=False):
+    """ Resolves a board name and makes the first request for the board
+
+    If the cached id of the board is no longer valid (e.g. the board was
+    deleted), the name is resolved again and the request retried.
+
+    :param load: callable taking the Board and making a request for it
+    :return: (Trello Board Object, result of load)
+    """
+    board = find_board(client, name, sync_state, create=create)
+    if board is None:
+        raise peeves.MissingBoardException(name)
+    try:
+        return board, load(board)
+    except trello_exceptions.ResourceUnavailable:
+        forget_board(sync_state, name)
+        resolved = find_board(client, name, sync_state, create=create)
+        if resolved is None:
+            raise peeves.MissingBoardException(name)
+        if resolved.id == board.id:
+            raise
+        return resolved, load(resolved)
+
+
+def get_or_create_board(config, name, sync_state=None):
+    trello_api = trelloclient.TrelloClient(
+        api_key=config['trello']['api_key'],
+        token=config['trello']['access_token'],
+        http_service=transport.get_session()
+    )
+    if sync_state is None:
+        sync_state = state.SyncState()
+    return find_board(trello_api, name, sync_state, create=True)
+
+
 def add_custom_field(config, board_id, field):
     url = "https://api.trello.com/1/customFields"
 
@@ -60,28 +128,49 @@ def add_custom_field(config, board_id, field):
     payload = "{\"idModel\":\"5aafc385f26015f1b9f7c372\",\"modelType\":\"board\",\"name\":\"source\",\"type\":\"text\",\"pos\":\"0\"}"
     headers = {'content-type': 'application/json'}
 
-    response = requests.request("POST", url, data=payload, headers=headers,
-                                params=querystring)
+    response = transport.get_session().request(
+        "POST", url, data=payload, headers=headers, params=querystring)
 
     print(response.text)
 
 
 class BoardManager(object):
 
-    def __init__(self, config, name):
+    def __init__(self, config, name=None, sync_state=None, board_id=None):
         self.config = config
+        self.http = ratelimit.ThrottledHTTPService(
+            buckets=ratelimit.trello_buckets(config['api_key'],
+                                             config['access_token']))
         self.client = self.get_client()
         self.sources = []
-        self.board = self._get_board(name)
-        if not self.board:
-            self.board = self._create_board(name)
-        self._initialize_board()
+        self.snapshot = None
+        self.label_index = None
+        self.state = sync_state
+        if self.state is None:
+            self.state = state.SyncState()
+        self.state_records = {}
+        self.comment_index = None
+        # nothing is requested until the board is used, the default lists
+        # and labels are only provisioned before writing to the board
+        self.name = name
+        if board_id is not None:
+            self.board = trelloboard.Board(client=self.client,
+                                           board_id=board_id,
+                                           name=name or '')
+        else:
+            self.board = find_board(self.client, name, self.state)
+            if not self.board:
+                self.board = self._create_board(name)
+        # a board found by name is checked by the first request made for it
+        self.resolved = board_id is not None
+        self.initialized = False
         self.debug = False
 
     def get_client(self):
         return trelloclient.TrelloClient(
             api_key=self.config['api_key'],
-            token=self.config['access_token']
+            token=self.config['access_token'],
+            http_service=self.http
         )
 
     def _create_board(self, name):
@@ -96,59 +185,88 @@ class BoardManager(object):
         for item in board.all_lists():
             if item.name in ["To Do", "Doing", "Done"]:
                 item.close()
+        self.state.set_mark(_board_key(name), board.id)
         return board
 
-    def _get_board(self, name):
-        """ Gets a reference to a Trello Board
-
-        :param name: name of board
-        :return: Trello Board Object
-        """
-        boards = self.client.list_boards()
-        board_filter = [b for b in boards if b.name == name]
-        if len(board_filter) > 0:
-            return board_filter[0]
-        return None
-
     def add_lists(self, trellolists):
-        board_list_names = [l.name for l in self.board.all_lists()]
+        # use the lists from the board snapshot when one has been loaded
+        if self.snapshot is not None:
+            board_list_names = [l.name for l in self.snapshot.lists]
+        else:
+            board_list_names = [l.name for l in self.board.all_lists()]
         # add default lists
         for name in trellolists:
             if name not in board_list_names:
                 trellolist = self.board.add_list(name)
                 trellolist.open()
+                if self.snapshot is not None:
+                    self.snapshot.add_list(trellolist)
 
     def _initialize_board(self):
         """ Configure board with defaults as needed
 
+        Only runs once, before the first write to the board.
+
         :param board: Trello Board Object
         :return: None
         """
+        if self.initialized:
+            return
+        self.initialized = True
         self.add_lists(['Complete', 'In Progress', 'Features', 'Bugs'])
 
         # add default labels
-        self.add_labels_by_color("black", ["RFE", "Bug"])
-        self.add_labels_by_color("red",
-                                 ["Untriaged", "Blocked", "CI-Blocked"])
+        self.add_labels({
+            "black": ["RFE", "Bug"],
+            "red": ["Untriaged", "Blocked", "CI-Blocked"],
+        })
+
+    def get_label_index(self):
+        """ Returns the labels of the board, read once and kept up to date
+
+        :return: LabelIndex
+        """
+        if self.label_index is None:
+            # use the labels from the board snapshot when one has been loaded
+            if self.snapshot is not None:
+                self.label_index = labels.LabelIndex(self.snapshot.labels)
+            else:
+                self.label_index = labels.LabelIndex(self.board.get_labels())
+        return self.label_index
+
+    def add_labels(self, labels_by_color):
+        """ Creates the labels missing from the board in a single pass
+
+        :param labels_by_color: dictionary of label names by color.  The
+                                supported colors are yellow, purple, blue,
+                                red, green, orange, black, sky, pink, lime
+                                and null
+        :return: list of the labels created
+        """
+        for color in labels_by_color:
+            # ensure color is a supported type
+            if color.lower() not in constants.SUPPORTED_LABEL_COLORS:
+                raise peeves.UnsupportedLabelColorException(color.lower())
+        with metrics.phase('labels'):
+            label_index = self.get_label_index()
+            created = []
+            for color, names in labels_by_color.items():
+                selected_color = color.lower()
+                for name in names:
+                    # ignore duplicate labels
+                    if label_index.get(selected_color, name) is not None:
+                        continue
+                    label = self.board.add_label(name, selected_color)
+                    label_index.add(label)
+                    if self.snapshot is not None:
+                        self.snapshot.labels.append(label)
+                    created.append(label)
+        return created
 
     def add_labels_by_color(self, color, names):
         # The supported colors are yellow, purple, blue, red, green, orange,
         # black, sky, pink, lime, null
-        board_labels = collections.defaultdict(list)
-        selected_color = color.lower()
-        [board_labels[label.color.lower()].append(label.name.lower()) for label
-         in self.board.get_labels()]
-        for name in names:
-            # ensure color is a supported type
-            if selected_color.lower() not in constants.SUPPORTED_LABEL_COLORS:
-                raise peeves.UnsupportedLabelColorException(selected_color)
-            if selected_color not in board_labels:
-                print("The color %s is not in the board labels" % color)
-                self.board.add_label(name, selected_color)
-            elif name.lower() not in board_labels[selected_color]:
-                self.board.add_label(name, selected_color)
-            else:  # ignore duplicate labels
-                pass
+        self.add_labels({color: names})
 
     def get_plugins(self):
         url = "https://api.trello.com/1/boards/%s/boardPlugins" % self.board.id
@@ -163,7 +281,7 @@ class BoardManager(object):
         querystring = {"idPlugin": constants.CUSTOM_FIELDS_PLUGIN_ID, "key": self.config['api_key'],
                        "token":  self.config['access_token']}
 
-        response = requests.request("POST", url, params=querystring)
+        response = self.http.request("POST", url, params=querystring)
 
         if response.status_code == 409:
             # boardPlugin for that association already exists
@@ -187,7 +305,7 @@ class BoardManager(object):
             "token": self.config['access_token']
         }
 
-        response = requests.request("POST", url, params=payload)
+        response = self.http.request("POST", url, params=payload)
 
         if response.status_code == 409:
             # that association already exists
@@ -206,7 +324,7 @@ class BoardManager(object):
             "token": self.config['access_token']
         }
 
-        response = requests.request("DELETE", url, params=payload)
+        response = self.http.request("DELETE", url, params=payload)
 
         if response.status_code == 200:
             return response.text
@@ -218,7 +336,7 @@ class BoardManager(object):
 
         payload = {"key": self.config['api_key'], "token": self.config['access_token']}
 
-        response = requests.request("GET", url, params=payload)
+        response = self.http.request("GET", url, params=payload)
 
         if response.status_code == 409:
             # that association already exists
@@ -243,7 +361,7 @@ class BoardManager(object):
         payload = {"key": self.config['api_key'], "token": self.config['access_token']}
         data = {'value': value}
 
-        response = requests.request("PUT", url, params=payload, json=data)
+        response = self.http.request("PUT", url, params=payload, json=data)
 
         if response.status_code == 200:
             return json.loads(response.text)
@@ -257,16 +375,138 @@ class BoardManager(object):
             lists[trellolist.name] = trellolist
         return lists
 
-    def update_cards(self, config):
+    def get_snapshot(self, card_filter='all'):
+        """ Loads the board contents in a single request
+
+        :param card_filter: 'all' or 'open'
+        :return: BoardSnapshot
+        """
+        def load(board):
+            return snapshot.BoardSnapshot(board, card_filter=card_filter)
+
+        with metrics.phase('load'):
+            if not self.resolved:
+                # the board was found by name, its id may have been cached
+                self.board, self.snapshot = load_board(
+                    self.client, self.name, self.state, load, create=True)
+                self.resolved = True
+            else:
+                self.snapshot = load(self.board)
+        # the snapshot has just read every label
+        self.label_index = labels.LabelIndex(self.snapshot.labels)
+        return self.snapshot
+
+    def get_comment_index(self):
+        """ Loads the comments made on the board since the last run
+
+        :return: CommentIndex
+        """
+        if self.comment_index is None:
+            self.comment_index = comments.CommentIndex(self.board, self.state)
+        else:
+            self.comment_index.load()
+        return self.comment_index
+
+    def _use_comment_index(self):
+        # sources mirroring comments check the board-wide index instead of
+        # reading the comments of every card
+        mirroring = [source for source in self.sources
+                     if getattr(source, 'include_comments', False)]
+        if mirroring:
+            comment_index = self.get_comment_index()
+            for source in mirroring:
+                source.comment_index = comment_index
+
+    def _write_card(self, card, card_data, target_list_name, board_labels):
+        """ Brings a card in line with its source artifact
+
+        Name, description, list and labels are compared with the card as
+        loaded in the snapshot and whatever differs is written in one
+        request.  Labels filch applied for an earlier version of the
+        artifact are removed, labels added by hand are kept.
+
+        :return: number of requests made
+        """
+        mutation = mutations.CardMutation(card)
+        mutation.set('name', card_data['name'])
+        mutation.set('desc', utils.get_description(card_data['description']))
+        mutation.set('idList',
+                     self.snapshot.lists_by_name[target_list_name].id)
+        if card_data.get('date_due') is not None:
+            mutation.set('due', card_data['date_due'])
+
+        record = self.state_records.get(card_data.get('source'), {})
+        stale = set(record.get('labels', [])) - set(card_data['labels'])
+        board_labels = labels.LabelIndex.of(board_labels)
+        stale_ids = set(label.id for label in board_labels.match(stale))
+        id_labels = [label_id for label_id in card.idLabels
+                     if label_id not in stale_ids]
+        id_labels.extend(label.id
+                         for label in board_labels.match(card_data['labels'])
+                         if label.id not in id_labels)
+        mutation.set('idLabels', id_labels)
+
+        if self.snapshot.source_field_id is not None:
+            current = self.snapshot.get_source(card)
+            mutation.set_custom_field(
+                self.snapshot.source_field_id, {'text': card_data['source']},
+                {'text': current} if current else None)
+        # moving a card between lists is timed apart from other updates
+        with metrics.phase('move' if 'idList' in mutation.fields
+                           else 'update'):
+            return mutation.apply()
+
+    @staticmethod
+    def _content_hash(source, result, card_data, target_list_name):
+        # sources that write more than the card data in update_card (e.g.
+        # comments or checklists) can provide a fingerprint of that data
+        fingerprint = None
+        if hasattr(source, 'fingerprint'):
+            fingerprint = source.fingerprint(result)
+        return state.SyncState.content_hash(card_data, target_list_name,
+                                            fingerprint)
+
+    def _is_current(self, source_url, content_hash):
+        """ Checks if a source artifact is unchanged since the last sync
+
+        The card recorded for the source must still be in the board and
+        in the list it was last sorted into.
+        """
+        record = self.state_records.get(source_url)
+        if record is None or record['content_hash'] != content_hash:
+            return False
+        card = self.snapshot.cards_by_id.get(record['card_id'])
+        return card is not None and card.idList == record['list_id']
+
+    def _record_card(self, source_url, card, card_data, content_hash=None,
+                     default_labels=None):
+        self.state.put(self.board.id, source_url, card.id, card.idList,
+                       card_data['labels'], content_hash, default_labels)
+        # later checks in the same run see what was just written
+        self.state_records[source_url] = {
+            'source': source_url,
+            'card_id': card.id,
+            'list_id': card.idList,
+            'labels': sorted(card_data['labels']),
+            'content_hash': content_hash,
+            'default_labels': sorted(default_labels or []),
+        }
+
+    def _find_card(self, source_url):
+        card = self.snapshot.cards_by_source.get(source_url)
+        if card is None and source_url in self.state_records:
+            # the card may have lost its source field
+            card = self.snapshot.cards_by_id.get(
+                self.state_records[source_url]['card_id'])
+        return card
+
+    def update_cards(self, config, force=False):
+        metrics.reset()
         # get reference to only open cards (excludes closed/archived cards)
-        cards = self.board.open_cards()
-        # get all of the cards that have sources
-        source_urls = [[(field.value, card) for field in card.customFields if
-                        field.name == 'source'] for card in cards if
-                       len(card.customFields) > 0]
-        # transform cards with sources into dictionary
-        cards_by_source = {k: v for (k, v) in
-                           list(itertools.chain(*source_urls))}
+        board_snapshot = self.get_snapshot(card_filter='open')
+        self._initialize_board()
+        cards_by_source = board_snapshot.cards_by_source
+        self.state_records = self.state.all(self.board.id)
 
         # get list of bugzilla IDs for batch query and update
         bz_ids = [k.split('id=')[1] for k
@@ -276,94 +516,200 @@ class BoardManager(object):
 
         blueprints = [k for k in cards_by_source.keys() if 'blueprint' in k]
 
-        board_labels = self.board.get_labels()
-
-        lists = self._get_lists()
+        board_labels = self.get_label_index()
 
         # find all of the BZs in the board
         if len(bz_ids) > 0:
             bzs_to_update = data.BugzillaIDSource(
                 config['bugzilla']['redhat'],
                 id_list=bz_ids,
-                include_fields=constants.BZ_INCLUDE_FIELDS,
+                sync_state=self.state,
             )
-            bzs = bzs_to_update.query()
-            for bz in bzs:
-                card = cards_by_source[bz.weburl]
-                bzs_to_update.update_card(bz, card, board_labels)
-                # where does this card need to be?
-                target_list_name = bzs_to_update.sort_card(bz)
-                if target_list_name != card.get_list().name:
-                    # move list
-                    card.change_list(lists[target_list_name].id)
+            # bugs are updated as each chunk of ids comes back
+            for bz in metrics.timed(bzs_to_update.query_stream(), 'query',
+                                    'BugzillaIDSource'):
+                self._update_card(bzs_to_update, bz, bz.weburl,
+                                  bzs_to_update.sort_card(bz), board_labels,
+                                  force)
 
         # find all of the lp bugs in the board
         if len(bug_ids) > 0:
             bugs_source = data.LaunchpadBugIDSource(bug_ids)
-            bugs = bugs_source.query()
-            for bug in bugs:
-                card = cards_by_source[bug.web_link]
-                bugs_source.update_card(bug, card, board_labels)
-                target_list_name = bugs_source.sort_card(bug.bug_tasks[0])
-                if target_list_name != card.get_list().name:
-                    # move list
-                    card.change_list(lists[target_list_name].id)
-
-    def import_cards(self):
-        board_fields = self.get_custom_fields()
-        source_field_id = [d for d in board_fields
-                           if d['name'] == 'source'][0]['id']
-
+            with metrics.phase('query', 'LaunchpadBugIDSource'):
+                bug_tasks = bugs_source.query()
+            for bug_task in bug_tasks:
+                self._update_card(bugs_source, bug_task, bug_task.bug.web_link,
+                                  bugs_source.sort_card(bug_task),
+                                  board_labels, force)
+        metrics.report()
+
+    def _update_card(self, source, result, source_url, target_list_name,
+                     board_labels, force=False):
+        card = self.snapshot.cards_by_source[source_url]
+        card_data = source.create_card(result, board_labels)
+        # a sync by id does not know which labels the sources that
+        # imported the card add to it, keep the ones they recorded
+        default_labels = self.state_records.get(source_url, {}).get(
+            'default_labels', [])
+        card_data['labels'] = card_data['labels'] + [
+            label for label in default_labels
+            if label not in card_data['labels']]
+        content_hash = self._content_hash(source, result, card_data,
+                                          target_list_name)
+        if not force and self._is_current(source_url, content_hash):
+            return
+        with metrics.phase('update', type(source).__name__):
+            source.update_card(result, card, board_labels)
+        self._write_card(card, card_data, target_list_name, board_labels)
+        self._record_card(source_url, card, card_data, content_hash,
+                          default_labels)
+
+    def _add_card(self, card_data, target_list_name, board_labels):
+        # card does not exist in board
+        # add to specified list for new items
+        # ensure labels being used are actually in the board
+        card_labels = labels.LabelIndex.of(board_labels).match(
+            card_data['labels'])
+
+        card = self.snapshot.lists_by_name[target_list_name].add_card(
+            card_data['name'],
+            utils.get_description(card_data['description']),
+            card_labels,
+            card_data['date_due'])
+
+        # set source for card
+        # if the board supports the "source" custom field
+        if self.snapshot.source_field_id is not None:
+            self.set_custom_field(card.id, self.snapshot.source_field_id,
+                                  {'text': card_data['source']})
+
+        # add this card to the snapshot we loaded before starting, so
+        # any duplicate from another source updates it instead
+        self.snapshot.add_card(card, card_data.get('source'))
+        return card
+
+    def _sync_card(self, source, result, card_data, target_list_name,
+                   board_labels, update=True, content_hash=None,
+                   default_labels=None):
+        card = self._find_card(card_data.get('source'))
+        if card is None:
+            with metrics.phase('create'):
+                card = self._add_card(card_data, target_list_name,
+                                      board_labels)
+            if not update:
+                self._record_card(card_data.get('source'), card, card_data,
+                                  default_labels=default_labels)
+        if not update:
+            return card
+
+        # update a card
+        with metrics.phase('update', type(source).__name__):
+            source.update_card(result, card, board_labels)
+        self._write_card(card, card_data, target_list_name, board_labels)
+        self._record_card(card_data.get('source'), card, card_data,
+                          content_hash, default_labels)
+        return card
+
+    def _start_sync(self, card_filter='all'):
+        """ Loads the board while every source is queried
+
+        :param card_filter: cards to load in the snapshot
+        :return: (plan, pool, snapshot future, generator of (source,
+                 results) tuples in the order the queries finish)
+        """
+        metrics.reset()
+        for source in self.sources:
+            # sources keep what they need between runs in the board's state
+            if getattr(source, 'sync_state', False) is None:
+                source.sync_state = self.state
+            if isinstance(source, data.IncrementalSource):
+                # marks are kept per board and staged until the cards of
+                # the query are written
+                source.board_id = self.board.id
+                source.pending_mark = None
+        plan = planner.SyncPlan(self.sources)
+        pool = futures.ThreadPoolExecutor(max_workers=1)
+        board_load = pool.submit(self.get_snapshot, card_filter)
+        return plan, pool, board_load, plan.start()
+
+    def _plan_source(self, plan, source, results):
+        # provision the labels a source needs before its cards are written
+        self.add_labels(source.get_labels(results))
+        return plan.add(source, results, self.label_index)
+
+    def _planned(self, plan, completed):
+        """ Yields the planned cards as they become ready to be written
+
+        A card is ready once every source that may return it has been
+        queried, so it is written once with the labels of all of them.
+        """
+        for source, results in completed:
+            for item in self._plan_source(plan, source, results):
+                yield item
+        # every query has finished or timed out
+        for item in plan.release():
+            yield item
+
+    def _commit_marks(self, plan):
+        # only called once every write succeeded, a failed sync queries the
+        # same changes again next time.  An abandoned query may still stage
+        # a mark, its results were never written.
+        for source in self.sources:
+            if (isinstance(source, data.IncrementalSource) and
+                    source not in plan.timed_out):
+                source.commit_mark()
+
+    def _report_timeouts(self, plan):
+        for source in plan.timed_out:
+            print("Timed out querying %s, its cards were not updated" %
+                  getattr(source, 'uri', source))
+
+    def _reconcile(self, writer, item, board_labels, force=False):
+        card_data = item.card_data
+        # skip anything that has not changed since the last sync
+        content_hash = self._content_hash(item.source, item.result,
+                                          card_data, item.target_list_name)
+        if force or not self._is_current(card_data.get('source'),
+                                         content_hash):
+            # writes for the same source artifact are kept in order
+            writer.submit(card_data.get('source'), self._sync_card,
+                          item.source, item.result, card_data,
+                          item.target_list_name, board_labels,
+                          content_hash=content_hash,
+                          default_labels=item.default_labels)
+
+    def import_cards(self, concurrency=1):
+        """ Adds cards for source artifacts not yet represented in the board
+
+        :param concurrency: number of threads used for Trello writes
+        :return: None
+        """
         # all cards are retrieved here, because we don't want to add a new card
         # for the same source artifact if we've had it in the board already
-        cards = self.board.all_cards()
-
-        # get a list of all the cards for checking duplicates before starting
-        # the create/update block
-        source_urls = [[(field.value, card) for field in card.customFields
-                        if field.name == 'source'] for card in cards]
-        cards_by_source = {k: v for (k, v) in
-                           list(itertools.chain(*source_urls))}
-
-        for source in self.sources:
-            results = source.query()
-            for color, labels in source.get_labels(results).iteritems():
-                self.add_labels_by_color(color, labels)
-            board_labels = self.board.get_labels()
-
-            for result in results:
-                card_data = source.create_card(result, board_labels)
-                # where does this card need to be?
-                target_list_name = source.sort_card(result)
-
-                card_desc = utils.get_description(card_data['description'])
-
-                if card_data.get('source') not in cards_by_source:
-                    # card does not exist in board
-                    # add to specified list for new items
-                    # ensure labels being used are actually in the board
-                    card_labels = [label for label in board_labels
-                                   if label.name in card_data['labels']]
-
-                    card = lists[target_list_name].add_card(
-                        card_data['name'],
-                        card_desc,
-                        card_labels,
-                        card_data['date_due'])
-
-                    # set source for card
-                    # if the board supports the "source" custom field
-                    if source_field_id is not None:
-                        # check to see if the card source field is set
-                        card_fields = {k: v for (k, v) in
-                                       [(field.name, field.value) for field in
-                                        card.customFields]}
-                        card_source = card_fields.get('source')
-                        if card_source is None:
-                            self.set_custom_field(card.id, source_field_id,
-                                                  {'text': card_data['source']})
-
-    def run(self):
+        plan, pool, board_load, completed = self._start_sync()
+        try:
+            board_load.result()
+            self._initialize_board()
+            self.state_records = self.state.all(self.board.id)
+            board_labels = self.get_label_index()
+            with executor.WriteExecutor(concurrency) as writer:
+                # cards are written as soon as the queries that may return
+                # them are done
+                for item in self._planned(plan, completed):
+                    # writes for the same source artifact are kept in order
+                    writer.submit(item.card_data.get('source'),
+                                  self._sync_card, item.source,
+                                  item.result, item.card_data,
+                                  item.target_list_name, board_labels,
+                                  update=False,
+                                  default_labels=item.default_labels)
+        finally:
+            pool.shutdown(wait=False)
+        self._commit_marks(plan)
+        self._report_timeouts(plan)
+        metrics.report()
+
+    def run(self, concurrency=1, force=False):
         # DEPRECATED
         # TODO(rbrady): Look at changing the strategy here to separate the import
         # and updating of cards.  The imports should query specific sources and
@@ -376,89 +722,37 @@ class BoardManager(object):
         # remaining cards.  Look to see if there is something that can be done
         # for querying sources via IDs so we cut down on request/response generation.
 
-        board_fields = self.get_custom_fields()
-        source_field_id = [d for d in board_fields if d['name'] == 'source'][0]['id']
-
         # get a collection of all cards before adding new cards
-        # append any created card to this list of cards to catch
-        # any duplicates
-        cards = self.board.all_cards()
-        # get a list of all the cards for checking duplicates before starting
-        # the create/update block
-        source_urls = [[(field.value, card) for field in card.customFields
-                        if field.name == 'source'] for card in cards]
-        cards_by_source = {k: v for (k, v) in
-                           list(itertools.chain(*source_urls))}
-        sources_to_process = list(cards_by_source.keys())
-        lists = self._get_lists()
-        for source in self.sources:
-            results = source.query()
-            for color, labels in source.get_labels(results).iteritems():
-                self.add_labels_by_color(color, labels)
-            board_labels = self.board.get_labels()
-            # TODO(rbrady): try a strategy where each item from the query is
-            # just used to check for cards to be created.  If the result.source
-            # is already present in the board, pass.  if the result is not present,
-            # then add it to the board.  Once all the cards have been added to
-            # the board from the current results, go through each card in the
-            # board and run the update method.  For the update method, check for
-            # each card source in the query results first (e.g. checking the cache)
-            # and if not present then do a single request based on the source url.
-            # see if there is a way to do batching of requests per single source
-            # of truth
-            for result in results:
-                card_data = source.create_card(result, board_labels)
-                # where does this card need to be?
-                target_list_name = source.sort_card(result)
-
-                card_desc = utils.get_description(card_data['description'])
-
-                if card_data.get('source') in cards_by_source:
-                    card = cards_by_source.get(card_data.get('source'))
-                else:
-                    # card does not exist in board
-                    # add to specified list for new items
-                    # ensure labels being used are actually in the board
-                    card_labels = [label for label in board_labels
-                                   if label.name in card_data['labels']]
-
-                    card = lists[target_list_name].add_card(
-                        card_data['name'],
-                        card_desc,
-                        card_labels,
-                        card_data['date_due'])
-
-                # set source for card
-                # if the board supports the "source" custom field
-                if source_field_id is not None:
-                    # check to see if the card source field is set
-                    card_fields = {k: v for (k, v) in
-                                   [(field.name, field.value) for field in
-                                    card.customFields]}
-                    card_source = card_fields.get('source')
-                    if card_source is None:
-                        self.set_custom_field(card.id, source_field_id,
-                                              {'text': card_data['source']})
-
-                # update a card
-                source.update_card(result, card, board_labels)
-                # if current card list and target list don't match,
-                # move the card to the target list
-                if target_list_name != card.get_list().name:
-                    # move list
-                    card.change_list(lists[target_list_name].id)
-
-        # before we move to the next card, add this card to the
-        # collection of cards we cached before starting this block
-        cards_by_source[card_data['source']] = card
-        if self.debug:
-            try:
-                sources_to_process.remove(card_data['source'])
-            except Exception as err:
-                print("Encountered error while attempting to "
-                      "process '%s'" % card_data['source'])
-                print(err)
+        # append any created card to the snapshot to catch
+        # any duplicates.  The sources are queried while it loads.
+        plan, pool, board_load, completed = self._start_sync()
+        try:
+            board_snapshot = board_load.result()
+            self._initialize_board()
+            self.state_records = self.state.all(self.board.id)
+            self._use_comment_index()
+            sources_to_process = list(board_snapshot.cards_by_source.keys())
+            board_labels = self.get_label_index()
+            with executor.WriteExecutor(concurrency) as writer:
+                # reconciliation starts as soon as the first query is done
+                for item in self._planned(plan, completed):
+                    self._reconcile(writer, item, board_labels, force)
+                    if self.debug:
+                        try:
+                            sources_to_process.remove(
+                                item.card_data['source'])
+                        except Exception as err:
+                            print("Encountered error while attempting "
+                                  "to process '%s'" %
+                                  item.card_data['source'])
+                            print(err)
+        finally:
+            pool.shutdown(wait=False)
+        self._commit_marks(plan)
+        self._report_timeouts(plan)
+        metrics.report()
 
+        if self.debug:
             print("cards not processed:")
             for source_item in sources_to_process:
                 print(source_item)
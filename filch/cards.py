@@ -19,6 +19,10 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import hashlib
+import re
+import threading
+
 # NOTICE: (rbrady) This method is deprecated and will be removed on 4/1/2018
 _MAX_DESC_LEN = 16384
 
@@ -39,11 +43,96 @@ def _get_description(desc):
     return desc
 
 
+# imported card descriptions end with a "source: service|id" line
+_SOURCE_LINE = re.compile(r'^source: (\S+)\s*$', re.MULTILINE)
+
+
+class CardIndex(object):
+    """ Index of the cards in a list used to avoid duplicates
+
+    The cards are read once, with a single request.  A card is a duplicate
+    if a card with the same title and description, or with the same
+    source, is already in the list.  The source of a card is its source
+    custom field, or the source line of its description.  Cards created
+    through the index are added to it, so one index can be kept for a whole
+    import session, by any number of threads.
+    """
+
+    def __init__(self, target_list):
+        self.target_list = target_list
+        self.lock = threading.Lock()
+        self.digests = set()
+        self.sources = set()
+        json_obj = target_list.client.fetch_json(
+            '/lists/' + target_list.id + '/cards',
+            query_params={'fields': 'name,desc',
+                          'customFieldItems': 'true'})
+        for card_json in json_obj:
+            self.digests.add(self.digest(card_json['name'],
+                                         card_json['desc']))
+            self.sources.update(self._sources(card_json['desc']))
+            for item in card_json.get('customFieldItems', []):
+                if item.get('value', {}).get('text'):
+                    self.sources.add(item['value']['text'])
+
+    @staticmethod
+    def digest(title, description):
+        return hashlib.sha1(
+            (u'%s\0%s' % (title, description)).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _sources(description, source=None):
+        sources = set(_SOURCE_LINE.findall(description or ''))
+        if source:
+            sources.add(source)
+        return sources
+
+    def reserve(self, title, description, source=None):
+        """ Adds a card to the index unless it is a duplicate
+
+        :param title: name of the card
+        :param description: description of the card
+        :param source: source url of the card, if known
+        :return: True if the card is not a duplicate
+        """
+        digest = self.digest(title, description)
+        sources = self._sources(description, source)
+        with self.lock:
+            if digest in self.digests or sources & self.sources:
+                return False
+            self.digests.add(digest)
+            self.sources.update(sources)
+        return True
+
+    def discard(self, title, description, source=None):
+        """ Removes a card that could not be created from the index """
+        with self.lock:
+            self.digests.discard(self.digest(title, description))
+            self.sources.difference_update(
+                self._sources(description, source))
+
+
 # NOTICE: (rbrady) This method is deprecated
-def create_card(target_list, title, description, labels=[], due="null"):
+def create_card(target_list, title, description, labels=[], due="null",
+                source=None, index=None):
+    """ Adds a card to a list unless it is already there
 
-    card_dup = [card for card in target_list.list_cards()
-                if card.name == title and card.desc == description]
-    if not card_dup:
-        description = _get_description(description)
+    :param target_list: Trello List Object
+    :param title: name of the card
+    :param description: description of the card
+    :param labels: list of Trello Label Objects
+    :param due: due date of the card
+    :param source: source url of the card, if known
+    :param index: CardIndex of the list, reused between calls
+    :return: Trello Card Object, or None for a duplicate
+    """
+    if index is None:
+        index = CardIndex(target_list)
+    description = _get_description(description)
+    if not index.reserve(title, description, source):
+        return None
+    try:
         return target_list.add_card(title, description, labels, due)
+    except Exception:
+        index.discard(title, description, source)
+        raise
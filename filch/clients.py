@@ -0,0 +1,109 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import re
+import threading
+
+import bugzilla
+from launchpadlib.launchpad import Launchpad
+
+from filch import constants
+from filch import transport
+
+
+# launchpadlib uses httplib2, which can not be shared between threads, so
+# each thread keeps its own service objects.  The credentials, WADL and HTTP
+# caches in LAUNCHPAD_CACHE_DIR are shared by all of them and between runs.
+_local = threading.local()
+# logins run one at a time: the first one may start the authorization flow
+# and write the credential store the others then read
+_launchpad_lock = threading.Lock()
+
+
+def get_launchpad(anonymous=False):
+    """ Returns a cached Launchpad service object for the current thread
+
+    :param anonymous: use an anonymous (read-only) login
+    :return: launchpadlib Launchpad
+    """
+    if not hasattr(_local, 'launchpad'):
+        _local.launchpad = {}
+    if anonymous not in _local.launchpad:
+        with _launchpad_lock:
+            _local.launchpad[anonymous] = _login_launchpad(anonymous)
+    return _local.launchpad[anonymous]
+
+
+def _login_launchpad(anonymous):
+    if anonymous:
+        return Launchpad.login_anonymously(
+            'filch', 'production',
+            launchpadlib_dir=constants.LAUNCHPAD_CACHE_DIR,
+            version='devel')
+    return Launchpad.login_with(
+        'Filch', 'production',
+        launchpadlib_dir=constants.LAUNCHPAD_CACHE_DIR,
+        version='devel')
+
+
+# Bugzilla clients are kept per thread as well, so parallel getbugs calls
+# never share a connection.  The first client for a url and user logs in
+# and stores the API token on disk, every other client (in this process or
+# a later run) reuses the token instead of logging in again.
+_bugzilla_lock = threading.Lock()
+_bugzilla_logins = set()
+
+
+def _token_file(url, user):
+    name = re.sub(r'[^\w.@-]', '_', '%s-%s' % (
+        bugzilla.Bugzilla.fix_url(url).split('/')[2], user))
+    return os.path.join(constants.BZ_TOKEN_DIR, name)
+
+
+def get_bugzilla(url, user, password, sslverify=True):
+    """ Returns a logged in Bugzilla client for the current thread
+
+    :param url: Bugzilla url
+    :param user: Bugzilla user
+    :param password: password of the user, only sent when no valid API
+                     token is stored for the user.  Without a password the
+                     client uses a stored token or stays anonymous, which
+                     is enough for public bugs
+    :param sslverify: verify the certificate of the Bugzilla host
+    :return: python-bugzilla Bugzilla44
+    """
+    if not hasattr(_local, 'bugzilla'):
+        _local.bugzilla = {}
+    key = (url, user)
+    if key not in _local.bugzilla:
+        with _bugzilla_lock:
+            # the password is left out so connecting does not log in
+            client = bugzilla.Bugzilla44(
+                url=url, user=user, sslverify=sslverify,
+                tokenfile=_token_file(url, user),
+                requests_session=transport.Session())
+            if key not in _bugzilla_logins:
+                if password and not client.logged_in:
+                    client.login(user, password)
+                _bugzilla_logins.add(key)
+        _local.bugzilla[key] = client
+    return _local.bugzilla[key]
@@ -21,7 +21,6 @@
 # SOFTWARE.
 #!/usr/bin/env python
 import collections
-import itertools
 import json
 import os
 import sys
@@ -35,10 +34,13 @@ from filch import configuration
 from filch import constants
 from filch import data
 from filch import exceptions as peeves
+from filch import profiling
+from filch import transport
 
 
 @click.command()
 @click.argument('board')
+@profiling.profile_option
 def health(board):
 
     try:
@@ -47,17 +49,19 @@ def health(board):
         click.echo(err)
         sys.exit(1)
 
+    transport.configure(**config.get('http', {}))
+
     board_manager = boards.BoardManager(config['trello'], board)
     duplicates = {}
     no_sources = []
 
-    lists = [item.id for item in board_manager.board.open_lists() if
+    board_snapshot = board_manager.get_snapshot()
+    lists = [item.id for item in board_snapshot.open_lists() if
              item.name != "Meta"]
-    cards = [card for card in board_manager.board.all_cards()
+    cards = [card for card in board_snapshot.cards
              if card.idList in lists]
-    sources = list(
-        itertools.chain(*[[(field.value, card) for field in card.customFields
-                           if field.name == 'source'] for card in cards]))
+    sources = [(board_snapshot.get_source(card) or '', card)
+               for card in cards]
 
     counts = collections.Counter([x for (x, y) in sources])
     dups = [(x, y) for (x, y) in counts.most_common() if y > 1]
@@ -75,7 +79,7 @@ def health(board):
     # display the cards that have more than one instance of the source
     if len(duplicates) > 0:
         click.echo(click.style("Duplicate Cards", bg='red', fg='black'))
-        for url, dup_cards in duplicates.iteritems():
+        for url, dup_cards in duplicates.items():
             print("%s(%s)" % (url, len(dup_cards)))
             dup_cards.sort(key=lambda x: x.list_labels.count, reverse=True)
             pprint([card_item.shortUrl for card_item in dup_cards[1:]])
@@ -24,18 +24,46 @@ import os
 import sys
 
 import click
-from pygerrit.rest import GerritRestAPI
 from trello import trelloclient
 
+from filch import boards
 from filch import cards
 from filch import configuration
 from filch import constants
+from filch import gerrit
+from filch import metrics
+from filch import pipeline
+from filch import profiling
+from filch import ratelimit
+from filch import state
+from filch import transport
 from filch import utils
 
 
+IMPORT_SERVICES = ['gerrit', 'blueprint', 'bug', 'story', 'bz', 'bugzilla']
+
+
+def _read_ids(ids, ids_from):
+    """ Yields the ids given as options, then the ids read from a file
+
+    :param ids: ids from --id
+    :param ids_from: open file with one id per line, or None
+    :return: generator of ids
+    """
+    for item_id in ids:
+        yield item_id
+    if ids_from is not None:
+        for line in ids_from:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+
 @click.command()
 @click.argument('service')
 @click.option('--id', default=None, type=str, multiple=True)
+@click.option('--ids-from', default=None, type=click.File('r'),
+              help='file with one id per line, - for stdin')
 @click.option('--url', default=None, type=str)
 @click.option('--host', default=None, type=str)
 @click.option('--user', default=None, type=str)
@@ -44,8 +72,11 @@ from filch import utils
 @click.option('--board', '-b', default=None, type=str)
 @click.option('--labels', '-l', multiple=True)
 @click.option('--list_name', default='New', type=str)
-def importer(service, id, url, host, user, password, project, board,
-             labels, list_name):
+@click.option('--concurrency', default=constants.IMPORT_CONCURRENCY, type=int,
+              help='number of artifacts fetched and cards created at once')
+@profiling.profile_option
+def importer(service, id, ids_from, url, host, user, password, project, board,
+             labels, list_name, concurrency):
     try:
         config = configuration.get_config()
     except Exception as err:
@@ -63,22 +94,34 @@ def importer(service, id, url, host, user, password, project, board,
         else:
             board = config['trello']['default_board']
 
+    transport.configure(**config.get('http', {}))
+    metrics.configure(**config.get('metrics', {}))
+
+    # concurrent card creation stays within the Trello rate limits
     trello_api = trelloclient.TrelloClient(
         api_key=config['trello']['api_key'],
-        token=config['trello']['access_token']
+        token=config['trello']['access_token'],
+        http_service=ratelimit.ThrottledHTTPService(
+            buckets=ratelimit.trello_buckets(trello_key, trello_token))
     )
 
-    board_obj = [b for b in trello_api.list_boards()
-                 if b.name == board][0]
+    # the board id is cached, so the board labels are the first request
+    board_obj, board_labels = boards.load_board(
+        trello_api, board, state.SyncState(),
+        lambda board_obj: board_obj.get_labels())
 
     # ensure labels being used are actually in the board
-    card_labels = [label for label in board_obj.get_labels()
+    card_labels = [label for label in board_labels
                       if label.name in list(labels)]
 
     # ensure list name exists in board
     board_list = [trello_list for trello_list in board_obj.open_lists()
                 if trello_list.name == list_name][0]
 
+    # existing cards are read once for the duplicate checks of the import
+    card_index = cards.CardIndex(board_list)
+    items = _read_ids(id, ids_from)
+
     if service == 'gerrit':
         # default to upstream openstack
         # if host is present then use that
@@ -89,62 +132,71 @@ def importer(service, id, url, host, user, password, project, board,
         if url:
             gerrit_url = url
 
-        gerrit_api = GerritRestAPI(url=gerrit_url, auth=None)
-        for change_id in list(id):
-            change = gerrit_api.get("/changes/%s" % change_id)
+        # changes are looked up in batched queries as the ids are read,
+        # so there is nothing left to fetch for each change
+        fetch = None
+        items = gerrit.get_changes(gerrit_url, items)
+
+        def write(change):
+            change['url'] = gerrit.change_url(gerrit_url, change)
             cards.create_card(
                 board_list,
                 change['subject'],
                 constants.GERRIT_CARD_DESC.format(**change),
                 labels=card_labels,
                 due="null",
+                index=card_index,
             )
-            click.echo(
-                'You have successfully imported "%s"' % change['subject'])
+            return change['subject']
 
-    if service == 'blueprint':
+    elif service == 'blueprint':
         if not project:
             click.echo('To import a blueprint you must provide a project.')
             sys.exit(1)
-        for bp_id in list(id):
-            blueprint = utils.get_blueprint(project, bp_id)
+
+        def fetch(bp_id):
+            return utils.get_blueprint(project, bp_id)
+
+        def write(blueprint):
             cards.create_card(
                 board_list,
                 blueprint['title'],
                 constants.BLUEPRINT_CARD_DESC.format(**blueprint),
                 labels=card_labels,
                 due="null",
+                index=card_index,
             )
-            click.echo(
-                'You have successfully imported "%s"' % blueprint['title'])
+            return blueprint['title']
+
+    elif service == 'bug':
+        fetch = utils.get_launchpad_bug
 
-    if service == 'bug':
-        for bug_id in list(id):
-            bug = utils.get_launchpad_bug(bug_id)
+        def write(bug):
             cards.create_card(
                 board_list,
                 bug['title'],
                 constants.BUG_CARD_DESC.format(**bug),
                 labels=card_labels,
                 due="null",
+                index=card_index,
             )
-            click.echo(
-                'You have successfully imported "%s"' % bug['title'])
+            return bug['title']
 
-    if service == 'story':
-        for story_id in list(id):
-            story = utils.get_storyboard_story(story_id)
+    elif service == 'story':
+        fetch = utils.get_storyboard_story
+
+        def write(story):
             cards.create_card(
                 board_list,
                 story['title'],
                 constants.STORY_CARD_DESC.format(**story),
                 labels=card_labels,
                 due="null",
+                index=card_index,
             )
-            click.echo(
-                'You have successfully imported "%s"' % story['title'])
+            return story['title']
 
-    if service in ['bz', 'bugzilla']:
+    elif service in ['bz', 'bugzilla']:
         if url:
             # also need user & password.  sslverify is optional
             if not user or not password:
@@ -169,53 +221,77 @@ def importer(service, id, url, host, user, password, project, board,
 
         sslverify = config['bugzilla'][host].get('sslverify', True)
 
-        for bz_id in list(id):
-            try:
-                bug = utils.get_bz(bz_id, url=url, user=user, password=password,
-                                   sslverify=sslverify)
+        def fetch(bz_id):
+            # each fetch thread logs in once and keeps its client
+            return utils.get_bz(bz_id, url=url, user=user, password=password,
+                                sslverify=sslverify)
 
-                if len(bug.comments) > 0:
-                    bug.description = bug.comments[0]['text']
+        def write(bug):
+            if len(bug.comments) > 0:
+                bug.description = bug.comments[0]['text']
 
-                bug_card = cards.create_card(
-                    board_list,
-                    bug.summary,
-                    constants.BZ_CARD_DESC.format(**bug.__dict__),
-                    labels=card_labels,
-                    due="null",
-                )
+            bug_card = cards.create_card(
+                board_list,
+                bug.summary,
+                constants.BZ_CARD_DESC.format(**bug.__dict__),
+                labels=card_labels,
+                due="null",
+                index=card_index,
+            )
+            # the card was already in the list
+            if bug_card is None:
+                return bug.summary
+
+            # adds comments to a card
+            if len(bug.comments) > 1:
+                for comment in bug.comments[1:]:
+                    bug_card.comment(constants.COMMENT_TEXT.format(
+                        text=comment['text'],
+                        author=comment['author'],
+                        create_time=comment['creation_time'],
+                        is_private=constants.COMMENT_PRIVACY[
+                            comment['is_private']
+                        ],
+                    ))
 
-                # adds comments to a card
-                if len(bug.comments) > 1:
-                    for comment in bug.comments[1:]:
-                        bug_card.comment(constants.COMMENT_TEXT.format(
-                            text=comment['text'],
-                            author=comment['author'],
-                            create_time=comment['creation_time'],
-                            is_private=constants.COMMENT_PRIVACY[
-                                comment['is_private']
-                            ],
-                        ))
-
-                # adds external trackers to card
-                if len(bug.external_bugs) > 0:
-                    external_trackers = []
-                    for ext_bug in bug.external_bugs:
-                        external_trackers.append(
-                            os.path.join(ext_bug['type']['url'],
-                                         ext_bug['ext_bz_bug_id'])
-                        )
-                    bug_card.add_checklist(
-                        'External Trackers',
-                        external_trackers
+            # adds external trackers to card
+            if len(bug.external_bugs) > 0:
+                external_trackers = []
+                for ext_bug in bug.external_bugs:
+                    external_trackers.append(
+                        os.path.join(ext_bug['type']['url'],
+                                     ext_bug['ext_bz_bug_id'])
                     )
+                bug_card.add_checklist(
+                    'External Trackers',
+                    external_trackers
+                )
+            return bug.summary
+
+    if service in IMPORT_SERVICES:
+        def on_done(item_id, title):
+            click.echo('You have successfully imported "%s"' % title)
+            if bulk.done % 100 == 0:
+                click.echo('%d imported (%.1f/s)' % (bulk.done,
+                                                     bulk.throughput))
+
+        def on_error(item, err):
+            # gerrit changes are written as they come back from the query
+            if service == 'gerrit':
+                item = item['_number']
+            click.echo('Failed to import "%s": %s' % (item, err))
 
-                click.echo('You have successfully imported "%s"' % bug.summary)
-            except Exception as err:
-                click.echo(err)
+        bulk = pipeline.Pipeline(fetch, write, concurrency=concurrency,
+                                 window=constants.IMPORT_WINDOW,
+                                 on_done=on_done, on_error=on_error)
+        bulk.run(items)
+        if ids_from is not None:
+            click.echo('%d imported, %d failed in %.1fs (%.1f/s)' % (
+                bulk.done, bulk.failed, bulk.elapsed, bulk.throughput))
+            metrics.report()
 
     if service == 'debug':
-        ids = list(id)
+        ids = list(items)
         print(ids)
 
 if __name__ == '__main__':
@@ -29,6 +29,8 @@ import jinja2
 from filch import boards
 from filch import configuration
 from filch import exceptions as peeves
+from filch import profiling
+from filch import transport
 
 
 @click.command()
@@ -37,6 +39,7 @@ from filch import exceptions as peeves
 @click.option('--output', default=None, type=str)
 @click.option('--board', '-b', default=None, type=str)
 @click.option('--list_name', default=None, type=str, multiple=True)
+@profiling.profile_option
 def reports(report, template, output, board, list_name):
     try:
         config = configuration.get_config()
@@ -48,6 +51,8 @@ def reports(report, template, output, board, list_name):
         click.echo(str(missing_setting))
         sys.exit(1)
 
+    transport.configure(**config.get('http', {}))
+
     # choose the report query
     if report == "board":
         if not board:
@@ -56,8 +61,12 @@ def reports(report, template, output, board, list_name):
             sys.exit(1)
         else:
             board_manager = boards.BoardManager(config['trello'], board)
+            board_snapshot = board_manager.get_snapshot()
             # create board context
-            context = {'board': board_manager.board}
+            context = {'board': board_manager.board,
+                       'lists': board_snapshot.open_lists(),
+                       'cards': board_snapshot.cards,
+                       'labels': board_snapshot.labels}
     else:
         click.echo('Unsupported report type requested.')
         sys.exit(1)
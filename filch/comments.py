@@ -0,0 +1,104 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import hashlib
+import threading
+
+
+class CommentIndex(object):
+    """ Digests of the comments on every card in a board
+
+    The board's commentCard actions are read a page at a time, starting from
+    the newest action seen by the previous run, and the digests are kept in
+    the sync state.  Checking whether a card already has a comment costs no
+    requests, so mirroring comments only writes the new ones.
+    """
+
+    page_size = 1000
+
+    def __init__(self, board, sync_state):
+        self.board = board
+        self.client = board.client
+        self.state = sync_state
+        self.lock = threading.Lock()
+        self.digests = self.state.get_comment_digests(self.board.id)
+        self.load()
+
+    @property
+    def mark_key(self):
+        return 'comments|%s' % self.board.id
+
+    @staticmethod
+    def digest(text):
+        # Trello may trim or reflow whitespace in a comment, so it is
+        # ignored when comparing comment text
+        normalized = u' '.join(text.split())
+        return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+    def _fetch_actions(self, since):
+        # actions are returned newest first, older pages are requested
+        # with the id of the oldest action already seen
+        before = None
+        while True:
+            query_params = {'filter': 'commentCard', 'limit': self.page_size,
+                            'fields': 'data,date'}
+            if since:
+                query_params['since'] = since
+            if before:
+                query_params['before'] = before
+            actions = self.client.fetch_json(
+                '/boards/' + self.board.id + '/actions',
+                query_params=query_params)
+            for action in actions:
+                yield action
+            if len(actions) < self.page_size:
+                return
+            before = actions[-1]['id']
+
+    def load(self):
+        """ Adds the comments made since the last load to the index
+
+        :return: None
+        """
+        newest = None
+        new_digests = []
+        for action in self._fetch_actions(self.state.get_mark(self.mark_key)):
+            if newest is None:
+                newest = action['id']
+            card_id = action['data']['card']['id']
+            digest = self.digest(action['data']['text'])
+            with self.lock:
+                self.digests[card_id].add(digest)
+            new_digests.append((card_id, digest))
+        self.state.add_comment_digests(self.board.id, new_digests)
+        if newest is not None:
+            self.state.set_mark(self.mark_key, newest)
+
+    def contains(self, card_id, text):
+        with self.lock:
+            return self.digest(text) in self.digests.get(card_id, ())
+
+    def add(self, card_id, text):
+        """ Records a comment filch has just added to a card """
+        digest = self.digest(text)
+        with self.lock:
+            self.digests[card_id].add(digest)
+        self.state.add_comment_digests(self.board.id, [(card_id, digest)])
@@ -19,9 +19,11 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import os
+
 GERRIT_CARD_DESC = u"""This card was imported to Trello from Gerrit.
 
-url: https://review.openstack.org/#/c/{_number}/
+url: {url}
 updated: {updated}
 project: {project}
 status: {status}
@@ -79,3 +81,64 @@ CUSTOM_FIELDS_PLUGIN_ID = "56d5e249a98895a9797bebb9"
 BZ_INCLUDE_FIELDS = ["id", "summary", "version", "status", "priority",
                          "comments", "weburl", "information_type",
                          "external_bugs", "keywords"]
+
+# Trello allows 300 requests per 10 seconds for each API key and 100 requests
+# per 10 seconds for each token.
+TRELLO_KEY_RATE_LIMIT = (300, 10)
+TRELLO_TOKEN_RATE_LIMIT = (100, 10)
+
+TRELLO_MAX_RETRIES = 5
+
+# connections kept alive per host and (connect, read) timeouts in seconds
+# for every HTTP request made by filch
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = (10, 60)
+
+# local state kept between runs
+FILCH_HOME = os.path.expanduser('~/.filch')
+STATE_PATH = os.path.join(FILCH_HOME, 'state.db')
+
+# launchpadlib keeps its credentials, WADL and HTTP cache here
+LAUNCHPAD_CACHE_DIR = os.path.join(FILCH_HOME, 'launchpadlib')
+LAUNCHPAD_CONCURRENCY = 8
+LAUNCHPAD_API_URL = 'https://api.launchpad.net/devel'
+# largest batch the Launchpad web service returns in a single page
+LAUNCHPAD_PAGE_SIZE = 300
+
+# number of bug ids sent to Bugzilla in each getbugs call and the number of
+# calls made at the same time
+BZ_CHUNK_SIZE = 200
+BZ_CONCURRENCY = 4
+
+# Bugzilla API tokens are kept here, one file per user, so filch only logs
+# in when a stored token is missing or has expired
+BZ_TOKEN_DIR = os.path.join(FILCH_HOME, 'bugzilla')
+
+# artifacts fetched at the same time by filch-import, and how many fetched
+# artifacts may wait for their card to be created
+IMPORT_CONCURRENCY = 8
+IMPORT_WINDOW = 64
+
+# change ids combined into one Gerrit query, and the changes returned in
+# each page of results
+GERRIT_BATCH_SIZE = 100
+GERRIT_PAGE_SIZE = 250
+
+STORYBOARD_URL = 'https://storyboard.openstack.org'
+STORYBOARD_API_URL = STORYBOARD_URL + '/api/v1'
+# largest page the StoryBoard list endpoints return
+STORYBOARD_PAGE_SIZE = 500
+
+# responses of Launchpad, StoryBoard and blueprint lookups are kept here and
+# revalidated with conditional requests, up to HTTP_CACHE_SIZE bytes
+HTTP_CACHE_PATH = os.path.join(FILCH_HOME, 'http-cache.db')
+HTTP_CACHE_SIZE = 64 * 1024 * 1024
+
+# seconds a source query may take before its results are ignored
+SOURCE_TIMEOUT = 900
+
+# upper bounds (seconds) of the request latency histogram buckets
+METRICS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# number of functions and allocation sites listed in a --profile report
+PROFILE_TOP = 30
@@ -20,39 +20,226 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import abc
+import collections
+from concurrent import futures
 import os
+import threading
+import time
+from urllib import parse
 
-import bugzilla
-from launchpadlib.launchpad import Launchpad
+from trello.checklist import Checklist
 
 
+from filch import clients
+from filch import comments
 from filch import constants
+from filch import gerrit
+from filch import labels as label_index
+from filch import launchpad
+from filch import state
+from filch import storyboard
 from filch import utils
 
 
-class BugzillaURISource(object):
+def _host(url):
+    return parse.urlsplit(url).netloc.lower()
+
+
+class IncrementalSource(object):
+    """ Keeps the high-water mark of an incremental source
+
+    A query only stages its new mark.  The mark is stored by commit_mark,
+    which the BoardManager calls once the cards of the query have been
+    written, so a failed or abandoned sync is queried again in full next
+    time.  Marks are kept per board.
+    """
+
+    # set by the BoardManager
+    board_id = None
+    pending_mark = None
+
+    def stage_mark(self, mark):
+        self.pending_mark = mark
+
+    def commit_mark(self):
+        """ Stores the mark staged by the last query
+
+        :return: None
+        """
+        if self.pending_mark is not None:
+            self.sync_state.set_mark(self.mark_key, self.pending_mark)
+            self.pending_mark = None
+
+
+class BugzillaURISource(IncrementalSource):
+
+    # bug fields read by get_labels, sort_card, create_card and update_card,
+    # only these (and any extra include_fields) are requested from Bugzilla.
+    # Comments are not requested with the bugs, see load_comments.
+    fields = {
+        'get_labels': ['version', 'priority'],
+        'sort_card': ['status', 'keywords'],
+        'create_card': ['id', 'summary', 'version', 'priority', 'weburl'],
+        'update_card': ['external_bugs'],
+    }
 
     def __init__(self, config, uri, include_fields, include_comments=False,
-                 default_labels=[]):
+                 default_labels=[], incremental=False, sync_state=None):
         self.uri = uri
         self.config = config
-        self.client = self.get_client()
         self.include_fields = include_fields
         self.default_labels = default_labels
         self.include_comments = include_comments
+        # set by the BoardManager to avoid reading comments card by card
+        self.comment_index = None
+        # incremental sources only ask Bugzilla for bugs changed since the
+        # last query, the high-water mark and the ids of the bugs matching
+        # the search are kept in the sync state between runs
+        self.incremental = incremental
+        self.sync_state = sync_state
+        if self.incremental and self.sync_state is None:
+            self.sync_state = state.SyncState()
 
     def get_client(self):
-        return bugzilla.Bugzilla44(
-            url=self.config['url'],
-            user=self.config['user'],
-            password=self.config['password'],
-            sslverify=self.config['sslverify']
-        )
+        return clients.get_bugzilla(
+            self.config['url'], self.config['user'],
+            self.config['password'],
+            sslverify=self.config.get('sslverify', True))
+
+    @property
+    def client(self):
+        # clients are shared per thread and only log in once per process
+        return self.get_client()
+
+    def query_fields(self):
+        """ Returns the bug fields to request from Bugzilla
+
+        The change time is always requested, it tells which bugs need their
+        comments fetched again.  Without a sync state to keep the comments
+        seen so far, the comments are requested with the bugs.
+
+        :return: list of field names
+        """
+        fields = ['id', 'last_change_time']
+        for names in list(self.fields.values()) + [self.include_fields or []]:
+            fields.extend(name for name in names
+                          if name not in fields and name != 'comments')
+        if self.sync_state is None:
+            fields.append('comments')
+        return fields
 
     def query(self):
         query = self.client.url_to_query(self.uri)
-        query["include_fields"] = self.include_fields
-        return self.client.query(query)
+        query["include_fields"] = self.query_fields()
+        if self.incremental:
+            results = self._query_changes(query)
+        else:
+            results = self.client.query(query)
+        self.load_comments(results)
+        return results
+
+    def query_ids(self):
+        """ Runs the search returning only the ids of the matching bugs """
+        query = self.client.url_to_query(self.uri)
+        query["include_fields"] = ["id"]
+        return [bz.id for bz in self.client.query(query)]
+
+    @property
+    def mark_key(self):
+        return 'bugzilla|%s|%s|%s' % (self.board_id, self.config['url'],
+                                      self.uri)
+
+    @staticmethod
+    def _format_time(value):
+        # xmlrpc returns DateTime objects, REST returns ISO 8601 strings
+        if hasattr(value, 'timetuple'):
+            return time.strftime('%Y-%m-%dT%H:%M:%SZ', value.timetuple())
+        return str(value)
+
+    def _query_changes(self, query):
+        """ Runs the search for bugs changed since the last query
+
+        Bugs that matched the search last time and have changed since, but
+        no longer match, are fetched by id and included in the results so
+        their cards are updated (e.g. moved to Complete) one last time.
+
+        :param query: the full search query
+        :return: list of bugs
+        """
+        mark = self.sync_state.get_mark(self.mark_key, {})
+        since = mark.get('since')
+        members = set(mark.get('members', []))
+
+        if since:
+            query['last_change_time'] = since
+        results = self.client.query(query)
+        matching = set(bz.id for bz in results)
+
+        dropped = []
+        if since and members - matching:
+            dropped = self.client.query({
+                'id': sorted(members - matching),
+                'last_change_time': since,
+                'include_fields': query['include_fields'],
+            })
+
+        changes = [self._format_time(bz.last_change_time)
+                   for bz in results + dropped]
+        if since:
+            changes.append(since)
+            members = (members | matching) - set(bz.id for bz in dropped)
+        else:
+            members = matching
+        self.stage_mark({
+            'since': max(changes) if changes else None,
+            'members': sorted(members),
+        })
+        return results + dropped
+
+    @staticmethod
+    def _set_comments(bz, bug_comments):
+        bz.comments = bug_comments
+        bz.comment_count = len(bug_comments)
+        bz.description = bug_comments[0]['text'] if bug_comments else ""
+
+    def _fetch_comments(self, bugs):
+        ids = [bz.id for bz in bugs]
+        comments_by_bug = {}
+        for i in range(0, len(ids), constants.BZ_CHUNK_SIZE):
+            comments_by_bug.update(self.client.get_comments(
+                ids[i:i + constants.BZ_CHUNK_SIZE])['bugs'])
+        for bz in bugs:
+            self._set_comments(
+                bz, comments_by_bug.get(str(bz.id), {}).get('comments', []))
+
+    def load_comments(self, bugs):
+        """ Fetches the comments of the bugs that are new or have changed
+
+        The description (first comment) and the comment count of each bug
+        are kept in the sync state.  A new comment changes the bug's change
+        time, bugs with the change time seen last time take them from there
+        and their comments are not fetched.
+
+        :param bugs: list of bugs
+        :return: None
+        """
+        if self.sync_state is None or not bugs:
+            return
+        url = self.config['url']
+        seen = self.sync_state.get_bug_comments(url, [bz.id for bz in bugs])
+        changed = []
+        for bz in bugs:
+            entry = seen.get(str(bz.id))
+            if entry and entry[0] == self._format_time(bz.last_change_time):
+                bz.comment_count = entry[1]
+                bz.description = entry[2]
+            else:
+                changed.append(bz)
+        if changed:
+            self._fetch_comments(changed)
+            self.sync_state.put_bug_comments(url, [
+                (bz.id, self._format_time(bz.last_change_time),
+                 bz.comment_count, bz.description) for bz in changed])
 
     @staticmethod
     def get_labels(results):
@@ -61,6 +248,14 @@ class BugzillaURISource(object):
             "blue": list(set([r.priority.title() for r in results]))
         }
 
+    def may_return(self, url):
+        """ Tells if a card source url may belong to a result of this source
+
+        The SyncPlan holds a card back until every source that may return
+        it has been queried.
+        """
+        return _host(url) == _host(self.config['url'])
+
     @staticmethod
     def sort_card(bz):
         # figure out which list
@@ -76,11 +271,29 @@ class BugzillaURISource(object):
 
         return target_list
 
+    @staticmethod
+    def get_external_trackers(bz):
+        return [os.path.join(ext_bug['type']['url'], ext_bug['ext_bz_bug_id'])
+                for ext_bug in getattr(bz, 'external_bugs', [])]
+
+    def _comment_count(self, bz):
+        if getattr(bz, 'comment_count', None) is None:
+            self._set_comments(bz, getattr(bz, 'comments', []))
+        return bz.comment_count
+
+    def fingerprint(self, bz):
+        # update_card mirrors comments and external trackers, which are not
+        # part of the card data, so they are included in the sync state hash
+        return {
+            'comments': (self._comment_count(bz)
+                         if self.include_comments else None),
+            'external_trackers': self.get_external_trackers(bz),
+        }
+
     def create_card(self, bz, labels):
 
-        bz.description = ""
-        if len(bz.comments) > 0:
-            bz.description = bz.comments[0]['text']
+        # sets the description when the comments came with the bug
+        self._comment_count(bz)
 
         card_labels = [bz.version, bz.priority] + self.default_labels
 
@@ -93,12 +306,17 @@ class BugzillaURISource(object):
         }
 
     def update_card(self, bz, card, labels):
-        # todo (rbrady): the pytrello library does not have support for
-        # deleting labels from a card.  Add the support to the pytrello
-        # library and then update the code here to check the current version
-        # and priority and update as necessary.
+        # the card text, list and labels (version and priority) are written
+        # by the BoardManager from the card data
         if self.include_comments:
-            card_comments = [cm['data']['text'] for cm in card.get_comments()]
+            # the comments of bugs that had not changed were not fetched
+            if getattr(bz, 'comments', None) is None:
+                self._fetch_comments([bz])
+            # without a board-wide comment index, read the card's comments
+            if self.comment_index is None:
+                card_comments = set(
+                    comments.CommentIndex.digest(cm['data']['text'])
+                    for cm in card.get_comments())
             # add comments in bz as comments in a card
             if len(bz.comments) > 1:
                 for comment in bz.comments[1:]:
@@ -110,35 +328,57 @@ class BugzillaURISource(object):
                             comment['is_private']],
                     )
                     try:
-                        if comment_text not in card_comments:
+                        if self.comment_index is not None:
+                            if not self.comment_index.contains(card.id,
+                                                               comment_text):
+                                card.comment(comment_text)
+                                self.comment_index.add(card.id, comment_text)
+                        elif (comments.CommentIndex.digest(comment_text)
+                              not in card_comments):
                             card.comment(comment_text)
                     except Exception as err:
                         print(str(err))
 
         # add external trackers in bz as a checklist in a card
-        # check for external tracker checklist in the card
-        # if it exists, get a reference to it, otherwise create it
-        card_checklists = card.fetch_checklists()
-        trackers_checklist = [cl for cl in card_checklists
+        self.update_trackers(card, self.get_external_trackers(bz))
+
+    @staticmethod
+    def update_trackers(card, external_trackers):
+        """ Reconciles the External Trackers checklist of a card
+
+        Only the tracker urls that were added or removed in Bugzilla are sent
+        to Trello.  The card's checklists are expected to have been loaded
+        with the board (see BoardSnapshot); cards without checklists do not
+        need a request to find that out.
+
+        :param card: Trello Card Object
+        :param external_trackers: list of tracker urls
+        :return: None
+        """
+        trackers_checklist = [cl for cl in card.checklists
                               if cl.name == "External Trackers"]
-        if len(trackers_checklist) < 1:
-            trackers_checklist = card.add_checklist('External Trackers', [])
-        else:
+        if len(trackers_checklist) > 0:
             trackers_checklist = trackers_checklist[0]
-
-        if len(bz.external_bugs) > 0:
-            # external trackers may be added, removed, etc.  clear all list
-            # items and rebuild.
-            trackers_checklist.clear()
-            external_trackers = []
-            for ext_bug in bz.external_bugs:
-                external_trackers.append(
-                    os.path.join(ext_bug['type']['url'],
-                                 ext_bug['ext_bz_bug_id'])
-                )
-
-            for tracker in external_trackers:
+        elif len(external_trackers) > 0:
+            json_obj = card.client.fetch_json(
+                '/cards/' + card.id + '/checklists',
+                http_method='POST',
+                post_args={'name': 'External Trackers'})
+            trackers_checklist = Checklist(card.client, json_obj,
+                                           trello_card=card.id)
+            card.checklists.append(trackers_checklist)
+        else:
+            return
+
+        existing = set(item['name'] for item in trackers_checklist.items)
+        desired = set(external_trackers)
+        for tracker in sorted(existing - desired):
+            trackers_checklist.delete_checklist_item(tracker)
+        # keep the order the trackers have in Bugzilla
+        for tracker in external_trackers:
+            if tracker not in existing:
                 trackers_checklist.add_checklist_item(tracker)
+                existing.add(tracker)
 
 
 class BugzillaIDSource(BugzillaURISource):
@@ -146,17 +386,284 @@ class BugzillaIDSource(BugzillaURISource):
     def __init__(self, config, id_list, include_fields=[],
                  uri="https://bugzilla.redhat.com/buglist.cgi?quicksearch=",
                  include_comments=False,
-                 default_labels=[]):
+                 default_labels=[],
+                 chunk_size=constants.BZ_CHUNK_SIZE,
+                 concurrency=constants.BZ_CONCURRENCY,
+                 sync_state=None):
         super(BugzillaIDSource, self).__init__(
             config, uri, include_fields=include_fields,
-            include_comments=include_comments, default_labels=[])
+            include_comments=include_comments, default_labels=default_labels,
+            sync_state=sync_state)
         self.id_list = id_list
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    def _get_chunk(self, ids):
+        # missing or private bugs are returned as None
+        bugs = [bz for bz in self.client.getbugs(
+            ids, include_fields=self.query_fields()) if bz]
+        self.load_comments(bugs)
+        return bugs
+
+    def _ids(self):
+        # unique ids, in the order they were given
+        return list(collections.OrderedDict.fromkeys(
+            str(bug_id) for bug_id in self.id_list))
+
+    def chunks(self):
+        ids = self._ids()
+        return [ids[i:i + self.chunk_size]
+                for i in range(0, len(ids), self.chunk_size)]
+
+    def query_stream(self):
+        """ Yields bugs as the getbugs calls for each chunk of ids return
+
+        :return: generator of bugs, in no particular order
+        """
+        chunks = self.chunks()
+        if len(chunks) == 1:
+            results = [self._get_chunk(chunks[0])]
+        else:
+            pool = futures.ThreadPoolExecutor(max_workers=self.concurrency)
+            results = (chunk.result() for chunk in futures.as_completed(
+                [pool.submit(self._get_chunk, ids) for ids in chunks]))
+        try:
+            for bugs in results:
+                for bz in bugs:
+                    yield bz
+        finally:
+            if len(chunks) > 1:
+                pool.shutdown(wait=True)
+
+    def query_by_id(self):
+        """ Returns the bugs keyed by id """
+        return {str(bz.id): bz for bz in self.query_stream()}
 
     def query(self):
-        self.uri += "%20".join(self.id_list)
-        query = self.client.url_to_query(self.uri)
-        query["include_fields"] = self.include_fields
-        return self.client.query(query)
+        bugs = self.query_by_id()
+        return [bugs[bug_id] for bug_id in self._ids() if bug_id in bugs]
+
+
+class GerritQuerySource(IncrementalSource):
+
+    def __init__(self, url, query, default_labels=[], incremental=True,
+                 sync_state=None, options=None):
+        self.url = url
+        self.query_string = query
+        self.default_labels = default_labels
+        self.options = options
+        # incremental sources only ask Gerrit for changes updated since the
+        # last query, like BugzillaURISource
+        self.incremental = incremental
+        self.sync_state = sync_state
+        if self.incremental and self.sync_state is None:
+            self.sync_state = state.SyncState()
+
+    @property
+    def mark_key(self):
+        return 'gerrit|%s|%s|%s' % (self.board_id, self.url,
+                                    self.query_string)
+
+    @staticmethod
+    def _format_time(updated):
+        # "2018-11-02 10:20:30.000000000" (UTC), after: takes seconds
+        return updated[:19]
+
+    def query_stream(self):
+        """ Yields the changes matching the query as its pages arrive
+
+        Changes that matched last time and were updated since, but no
+        longer match (e.g. once merged or abandoned), are looked up by
+        number and yielded as well so their cards are updated.
+
+        :return: generator of changes
+        """
+        if not self.incremental:
+            for change in gerrit.query_changes(self.url, self.query_string,
+                                               options=self.options):
+                yield change
+            return
+
+        mark = self.sync_state.get_mark(self.mark_key, {})
+        since = mark.get('since')
+        members = set(mark.get('members', []))
+        query = self.query_string
+        after = None
+        if since:
+            after = 'after:"%s"' % since
+            query = '(%s) %s' % (query, after)
+
+        changes = []
+        matching = set()
+        for change in gerrit.query_changes(self.url, query,
+                                           options=self.options):
+            matching.add(change['_number'])
+            changes.append(self._format_time(change['updated']))
+            yield change
+
+        dropped = set()
+        if since and members - matching:
+            for change in gerrit.get_changes(self.url,
+                                             sorted(members - matching),
+                                             options=self.options,
+                                             query=after):
+                dropped.add(change['_number'])
+                changes.append(self._format_time(change['updated']))
+                yield change
+
+        if since:
+            changes.append(since)
+            members = (members | matching) - dropped
+        else:
+            members = matching
+        # only staged once every page has been read
+        self.stage_mark({
+            'since': max(changes) if changes else None,
+            'members': sorted(members),
+        })
+
+    def query(self):
+        return list(self.query_stream())
+
+    @staticmethod
+    def get_labels(results):
+        return {}
+
+    def may_return(self, url):
+        return _host(url) == _host(self.url)
+
+    @staticmethod
+    def sort_card(change):
+        if change['status'] in ['MERGED', 'ABANDONED']:
+            return 'Complete'
+        return 'In Progress'
+
+    def create_card(self, change, labels=[]):
+        card_values = dict(change, url=gerrit.change_url(self.url, change))
+        return {
+            'name': change['subject'],
+            'description': constants.GERRIT_CARD_DESC.format(**card_values),
+            'labels': list(self.default_labels),
+            'date_due': None,
+            'source': card_values['url'],
+        }
+
+    def update_card(self, change, card, labels):
+        pass
+
+
+class StoryBoardSource(IncrementalSource):
+
+    def __init__(self, project_group=None, tags=None, default_labels=[],
+                 incremental=True, sync_state=None,
+                 url=constants.STORYBOARD_API_URL):
+        if not project_group and not tags:
+            raise ValueError('a project group or tags are required')
+        self.project_group = project_group
+        self.tags = tags or []
+        self.default_labels = default_labels
+        self.url = url
+        self.project_group_id = None
+        # incremental sources only ask for stories updated since the last
+        # query, the time of the newest update is kept in the sync state
+        self.incremental = incremental
+        self.sync_state = sync_state
+        if self.incremental and self.sync_state is None:
+            self.sync_state = state.SyncState()
+
+    @property
+    def mark_key(self):
+        return 'storyboard|%s|%s|%s|%s' % (self.board_id, self.url,
+                                           self.project_group,
+                                           ','.join(sorted(self.tags)))
+
+    def _filters(self):
+        params = {}
+        if self.project_group:
+            if self.project_group_id is None:
+                self.project_group_id = storyboard.get_project_group_id(
+                    self.project_group, url=self.url)
+            params['project_group_id'] = self.project_group_id
+        if self.tags:
+            params['tags'] = self.tags
+        return params
+
+    @staticmethod
+    def _updated(story):
+        # stories that were never changed have no updated_at
+        return story.get('updated_at') or story['created_at']
+
+    def query_stream(self):
+        """ Yields the stories of the project group or tags page by page
+
+        Task statuses come with each story when StoryBoard includes them in
+        the list, otherwise the tasks of the project group are read in bulk
+        once.
+
+        :return: generator of stories
+        """
+        params = self._filters()
+        headers = None
+        since = None
+        if self.incremental:
+            since = self.sync_state.get_mark(self.mark_key)
+            if since:
+                params['updated_since'] = since
+                headers = {
+                    'If-Modified-Since': storyboard.http_date(since)}
+
+        task_statuses = None
+        newest = [since] if since else []
+        for story in storyboard.get_pages('stories', params, headers=headers,
+                                          url=self.url):
+            if 'task_statuses' in story:
+                story['tasks'] = dict(
+                    (status['key'], status['count'])
+                    for status in story['task_statuses'])
+            elif self.project_group_id is not None:
+                if task_statuses is None:
+                    task_statuses = storyboard.get_task_statuses(
+                        self.project_group_id, url=self.url)
+                story['tasks'] = dict(task_statuses.get(story['id'], {}))
+            else:
+                story['tasks'] = {}
+            story['story_url'] = '%s/#!/story/%s' % (
+                self.url.split('/api/')[0], story['id'])
+            newest.append(self._updated(story))
+            yield story
+
+        if self.incremental and newest:
+            self.stage_mark(max(newest))
+
+    def query(self):
+        return list(self.query_stream())
+
+    @staticmethod
+    def get_labels(results):
+        return {}
+
+    def may_return(self, url):
+        return _host(url) == _host(self.url)
+
+    @staticmethod
+    def sort_card(story):
+        if story['status'] in ['merged', 'invalid']:
+            return 'Complete'
+        if story['tasks'].get('inprogress') or story['tasks'].get('review'):
+            return 'In Progress'
+        return 'Features'
+
+    def create_card(self, story, labels=[]):
+        return {
+            'name': story['title'],
+            'description': constants.STORY_CARD_DESC.format(**story),
+            'labels': list(self.default_labels),
+            'date_due': None,
+            'source': story['story_url'],
+        }
+
+    def update_card(self, story, card, labels):
+        pass
 
 
 class ManualBlueprintSource(object):
@@ -176,6 +683,9 @@ class ManualBlueprintSource(object):
     def get_labels(results):
         return {}
 
+    def may_return(self, url):
+        return _host(url).endswith('launchpad.net')
+
     @staticmethod
     def sort_card(blueprint):
         if blueprint['is_complete']:
@@ -193,9 +703,8 @@ class ManualBlueprintSource(object):
         # normalize the priority to fit within typical RFE attributes
         if priority == 'Essential':
             priority = 'High'
-        bp_labels = [label.name for label in labels
-                     if label.name.endswith("(%s)" % version.title())
-                     or label.name.lower() == priority.lower()]
+        bp_labels = label_index.LabelIndex.of(labels).release_labels(
+            version.title(), priority)
 
         card_labels = bp_labels + self.default_labels
 
@@ -208,9 +717,7 @@ class ManualBlueprintSource(object):
         }
 
     def update_card(self, blueprint, card, labels):
-        # todo(rbrady): add code to swap labels for version and priority
-        # if needed, once the ability to delete labels from a card is added
-        # to py-trello.
+        # version and priority labels are swapped by the BoardManager
         pass
 
 
@@ -222,16 +729,17 @@ class LaunchpadBugSource(object):
         self.default_labels = default_labels
 
     def query(self):
-        launchpad = Launchpad.login_anonymously('filch', 'production',
-                                                version='devel')
-        project = launchpad.projects[self.project]
-        bugs = project.searchTasks(**self.search_args)
-        return bugs
+        # bugs and milestones are loaded with the tasks, instead of lazily
+        # for every attribute create_card reads
+        return list(launchpad.TaskSearch(self.project, self.search_args))
 
     @staticmethod
     def get_labels(results):
         return {}
 
+    def may_return(self, url):
+        return _host(url).endswith('launchpad.net')
+
     @staticmethod
     def sort_card(bug):
         if bug.status in ["New", "Confirmed", "Triaged", "Incomplete"]:
@@ -254,9 +762,8 @@ class LaunchpadBugSource(object):
         if priority == 'Wishlist':
             priority = 'Low'
 
-        lp_labels = [label.name for label in labels
-                     if label.name.endswith("(%s)" % version.title())
-                     or label.name.lower() == priority.lower()]
+        lp_labels = label_index.LabelIndex.of(labels).release_labels(
+            version.title(), priority)
 
         card_labels = lp_labels + self.default_labels
 
@@ -276,21 +783,66 @@ class LaunchpadBugSource(object):
         }
 
     def update_card(self, bug, card, labels):
-        # todo(rbrady): add code to swap labels for version and priority
-        # if needed, once the ability to delete labels from a card is added
-        # to py-trello.
+        # version and priority labels are swapped by the BoardManager
         pass
 
 
+class PrefetchedBugTask(object):
+    """ A Launchpad bug task with its bug and milestone already loaded
+
+    launchpadlib returns a new, unloaded entry every time a link such as
+    bug_task.bug is followed, so each attribute read from it would cost
+    another request.  The milestone is kept as a plain Entry, the way
+    TaskSearch returns it.
+    """
+
+    def __init__(self, bug_task, bug, milestone=None):
+        self._bug_task = bug_task
+        self.bug = bug
+        self.milestone = milestone
+
+    def __getattr__(self, name):
+        return getattr(self._bug_task, name)
+
+
 class LaunchpadBugIDSource(LaunchpadBugSource):
 
-    def __init__(self, id_list, default_labels=[]):
+    # the worker threads are kept between queries, so each keeps its
+    # Launchpad service object instead of logging in again every query
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, id_list, default_labels=[],
+                 concurrency=constants.LAUNCHPAD_CONCURRENCY):
         self.id_list = id_list
         self.default_labels = default_labels
+        self.concurrency = concurrency
+
+    @staticmethod
+    def _fetch(bug_id):
+        service = clients.get_launchpad()
+        # the bug and its tasks are loaded while still in the worker thread,
+        # nothing is fetched lazily once the results are handed back
+        bug = service.bugs[bug_id]
+        bug_task = bug.bug_tasks[0]
+        milestone = None
+        if bug_task.milestone is not None:
+            milestone = launchpad.Entry({'name': bug_task.milestone.name})
+        return PrefetchedBugTask(bug_task, bug, milestone)
+
+    def _pool(self):
+        with self._pools_lock:
+            if self.concurrency not in self._pools:
+                self._pools[self.concurrency] = futures.ThreadPoolExecutor(
+                    max_workers=self.concurrency)
+            return self._pools[self.concurrency]
 
     def query(self):
-        launchpad = Launchpad.login_with('Filch', 'production', version='devel')
-        bugs = []
-        for bug_id in self.id_list:
-            bugs.append(launchpad.bugs[bug_id])
-        return bugs
+        """ Fetches the bugs in a bounded thread pool
+
+        :return: list with the first bug task of each bug
+        """
+        # log in on the calling thread first, the workers then find the
+        # credentials and WADL cached instead of each starting a login
+        clients.get_launchpad()
+        return list(self._pool().map(self._fetch, self.id_list))
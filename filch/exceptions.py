@@ -52,6 +52,16 @@ class UnsupportedLabelColorException(Exception):
                    ' supported colors: %s' % (self.color, self.colors))
         super(UnsupportedLabelColorException, self).__init__(message)
 
+
+class MissingBoardException(Exception):
+    """No Trello board with the configured name."""
+
+    def __init__(self, name):
+        self.name = name
+        message = 'No Trello board named: %s' % self.name
+        super(MissingBoardException, self).__init__(message)
+
+
 class APIException(Exception):
     """An execption occurs in Trello's API or an unhandled status code is returned."""
 
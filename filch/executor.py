@@ -0,0 +1,117 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import collections
+from concurrent import futures
+import threading
+
+
+class WriteExecutor(object):
+    """ Runs Trello writes on a thread pool
+
+    Operations submitted with the same key (e.g. a card's source url) are
+    executed one after another in submission order, while operations for
+    different keys run concurrently.  With a concurrency of 1 every
+    operation runs inline in the calling thread.
+    """
+
+    def __init__(self, concurrency=1):
+        self.concurrency = concurrency
+        self.pool = None
+        if concurrency > 1:
+            self.pool = futures.ThreadPoolExecutor(max_workers=concurrency)
+        self.lock = threading.Lock()
+        self.queues = {}
+        self.pending = []
+
+    def submit(self, key, fn, *args, **kwargs):
+        """ Schedule a write
+
+        :param key: operations sharing a key keep their relative order
+        :param fn: callable performing the write
+        :return: concurrent.futures.Future with the result of fn
+        """
+        future = futures.Future()
+        if self.pool is None:
+            self._execute(future, fn, args, kwargs)
+            self.pending.append(future)
+            return future
+
+        with self.lock:
+            self.pending.append(future)
+            queue = self.queues.get(key)
+            if queue is not None:
+                # a worker is already draining this key, it will pick
+                # the new operation up when the earlier ones are done
+                queue.append((future, fn, args, kwargs))
+                return future
+            self.queues[key] = collections.deque([(future, fn, args, kwargs)])
+        self.pool.submit(self._drain, key)
+        return future
+
+    @staticmethod
+    def _execute(future, fn, args, kwargs):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as err:
+            future.set_exception(err)
+
+    def _drain(self, key):
+        while True:
+            with self.lock:
+                queue = self.queues[key]
+                if not queue:
+                    del self.queues[key]
+                    return
+                future, fn, args, kwargs = queue.popleft()
+            self._execute(future, fn, args, kwargs)
+
+    def join(self):
+        """ Wait for every submitted write to finish
+
+        :return: None
+        :raises: the first exception raised by a write, if any
+        """
+        while True:
+            with self.lock:
+                pending, self.pending = self.pending, []
+            if not pending:
+                return
+            futures.wait(pending)
+            for future in pending:
+                if future.exception() is not None:
+                    raise future.exception()
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.join()
+        finally:
+            self.shutdown()
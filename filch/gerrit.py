@@ -0,0 +1,99 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import itertools
+import json
+
+from filch import constants
+from filch import transport
+
+
+# Gerrit prefixes its json responses to prevent XSSI
+_XSSI_PREFIX = ")]}'"
+
+
+def get_json(url, params=None):
+    response = transport.get_session().get(
+        url, params=params, headers={'Accept': 'application/json'})
+    response.raise_for_status()
+    text = response.text
+    if text.startswith(_XSSI_PREFIX):
+        text = text[len(_XSSI_PREFIX):]
+    return json.loads(text)
+
+
+def query_changes(url, query, options=None,
+                  page_size=constants.GERRIT_PAGE_SIZE):
+    """ Runs a change query, following the pages of results
+
+    :param url: url of the Gerrit server
+    :param query: Gerrit search query
+    :param options: additional fields to return (e.g. DETAILED_ACCOUNTS),
+                    without options Gerrit returns the basic change details
+    :param page_size: number of changes requested per page
+    :return: generator of changes, in the order Gerrit returns them
+    """
+    endpoint = '%s/changes/' % url.rstrip('/')
+    start = 0
+    while True:
+        params = {'q': query, 'n': page_size}
+        if start:
+            params['S'] = start
+        if options:
+            params['o'] = options
+        changes = get_json(endpoint, params)
+        for change in changes:
+            yield change
+        # the last change of a page is flagged when there are more
+        if not changes or not changes[-1].get('_more_changes'):
+            return
+        start += len(changes)
+
+
+def change_url(url, change):
+    return '%s/#/c/%s/' % (url.rstrip('/'), change['_number'])
+
+
+def get_changes(url, change_ids, options=None, query=None,
+                batch_size=constants.GERRIT_BATCH_SIZE):
+    """ Looks up changes by number or Change-Id in batched queries
+
+    Change ids are read lazily, so they can be streamed from a file.  Ids
+    that do not match a change are left out.
+
+    :param url: url of the Gerrit server
+    :param change_ids: iterable of change numbers or Change-Ids
+    :param options: additional fields to return
+    :param query: search terms the changes must also match
+    :param batch_size: number of ids looked up per query
+    :return: generator of changes
+    """
+    change_ids = iter(change_ids)
+    while True:
+        batch = list(itertools.islice(change_ids, batch_size))
+        if not batch:
+            return
+        batch_query = ' OR '.join('change:%s' % change_id
+                                  for change_id in batch)
+        if query:
+            batch_query = '(%s) %s' % (batch_query, query)
+        for change in query_changes(url, batch_query, options=options):
+            yield change
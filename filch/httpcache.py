@@ -0,0 +1,163 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from requests import models
+
+from filch import constants
+from filch import transport
+
+
+class HTTPCache(object):
+    """ On-disk cache of json responses revalidated with conditional GETs
+
+    Responses carrying an ETag or Last-Modified header are stored with it.
+    The next GET of the same url sends If-None-Match/If-Modified-Since and
+    a 304 is answered from the cache, so unchanged resources only transfer
+    headers.  The least recently used responses are evicted once the
+    stored bodies exceed max_size bytes.
+    """
+
+    def __init__(self, path=constants.HTTP_CACHE_PATH,
+                 max_size=constants.HTTP_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        if path != ':memory:' and not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self.lock, self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'url TEXT PRIMARY KEY, '
+                'etag TEXT, '
+                'last_modified TEXT, '
+                'body TEXT, '
+                'size INTEGER, '
+                'accessed REAL)')
+
+    def _lookup(self, key):
+        with self.lock:
+            return self.connection.execute(
+                'SELECT etag, last_modified, body FROM responses '
+                'WHERE url = ?', (key,)).fetchone()
+
+    def _touch(self, key):
+        with self.lock, self.connection:
+            self.connection.execute(
+                'UPDATE responses SET accessed = ? WHERE url = ?',
+                (time.time(), key))
+
+    def _store(self, key, etag, last_modified, body):
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO responses (url, etag, last_modified, '
+                'body, size, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, etag, last_modified, body, len(body), time.time()))
+            self._evict()
+
+    def _evict(self):
+        # called with the lock held
+        total = self.connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_size:
+            return
+        rows = self.connection.execute(
+            'SELECT url, size FROM responses ORDER BY accessed').fetchall()
+        evicted = []
+        for url, size in rows:
+            if total <= self.max_size:
+                break
+            evicted.append((url,))
+            total -= size
+        self.connection.executemany(
+            'DELETE FROM responses WHERE url = ?', evicted)
+
+    def get_json(self, url, params=None):
+        """ GETs a json resource, revalidating a cached copy if there is one
+
+        :param url: url of the resource
+        :param params: query parameters
+        :return: decoded json
+        """
+        key = _full_url(url, params)
+        cached = self._lookup(key)
+        headers = {}
+        if cached is not None:
+            if cached[0]:
+                headers['If-None-Match'] = cached[0]
+            if cached[1]:
+                headers['If-Modified-Since'] = cached[1]
+        response = transport.get_session().get(key, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            with self.lock:
+                self.hits += 1
+            self._touch(key)
+            return json.loads(cached[2])
+
+        with self.lock:
+            self.misses += 1
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag or last_modified:
+            self._store(key, etag, last_modified, response.text)
+        return response.json()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def _full_url(url, params=None):
+    request = models.PreparedRequest()
+    request.prepare_url(url, params)
+    return request.url
+
+
+_cache = None
+_lock = threading.Lock()
+
+
+def get_cache():
+    """ Returns the process-wide HTTP cache
+
+    :return: HTTPCache
+    """
+    global _cache
+    with _lock:
+        if _cache is None:
+            _cache = HTTPCache()
+        return _cache
+
+
+def get_json(url, params=None):
+    return get_cache().get_json(url, params)
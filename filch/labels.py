@@ -0,0 +1,106 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import collections
+import re
+import threading
+
+
+# "Queens (Queens)" style labels carry a release in a trailing suffix
+_VERSION_SUFFIX = re.compile(r'\(([^()]*)\)\s*$')
+
+
+class LabelIndex(object):
+    """ The labels of a board, indexed for the lookups filch makes
+
+    Labels are indexed by (color, lowercase name), by name and by the
+    version in a trailing "(version)" suffix.  Trello returns a null color
+    for labels without one, they are indexed under the color 'null'.  The index is built once from
+    labels that were already loaded and only changes when filch creates a
+    label, which is added with add().
+    """
+
+    def __init__(self, labels=()):
+        self.lock = threading.Lock()
+        self.labels = []
+        self.by_key = {}
+        self.by_name = collections.defaultdict(list)
+        self.by_version = collections.defaultdict(list)
+        for label in labels:
+            self.add(label)
+
+    @classmethod
+    def of(cls, labels):
+        """ Returns labels as an index, indexing a plain list if needed """
+        if isinstance(labels, cls):
+            return labels
+        return cls(labels or [])
+
+    def add(self, label):
+        with self.lock:
+            self.labels.append(label)
+            self.by_key.setdefault(
+                ((label.color or 'null').lower(), label.name.lower()), label)
+            self.by_name[label.name.lower()].append(label)
+            version = _VERSION_SUFFIX.search(label.name)
+            if version:
+                self.by_version[version.group(1)].append(label)
+
+    def __iter__(self):
+        return iter(list(self.labels))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def get(self, color, name):
+        """ Returns the label with a color and name (in any case), or None """
+        return self.by_key.get(((color or 'null').lower(), name.lower()))
+
+    def named(self, name):
+        """ Returns the labels with a name, in any case """
+        return list(self.by_name.get(name.lower(), []))
+
+    def with_version(self, version):
+        """ Returns the labels whose name ends with "(version)" """
+        return list(self.by_version.get(version, []))
+
+    def match(self, names):
+        """ Returns the labels with exactly one of the names
+
+        :param names: list of label names
+        :return: list of Trello Label Objects
+        """
+        matched = []
+        for name in collections.OrderedDict.fromkeys(names):
+            matched.extend(label for label in self.named(name)
+                           if label.name == name)
+        return matched
+
+    def release_labels(self, version, priority):
+        """ Names of the labels for a release version and a priority
+
+        :param version: release, matched against the version suffix
+        :param priority: matched against the whole name, in any case
+        :return: list of label names
+        """
+        names = [label.name for label in
+                 self.with_version(version) + self.named(priority)]
+        return list(collections.OrderedDict.fromkeys(names))
@@ -0,0 +1,141 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import collections
+from concurrent import futures
+import threading
+
+from filch import constants
+from filch import transport
+
+
+class Entry(object):
+    """ Read-only view of a Launchpad web service representation
+
+    Attributes are read from the json representation, so unlike
+    launchpadlib entries nothing is fetched lazily.
+    """
+
+    def __init__(self, representation, **links):
+        self._representation = representation
+        for name, value in links.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name):
+        try:
+            return self._representation[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def get_json(url, params=None):
+    response = transport.get_session().get(url, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def _format_args(search_args):
+    params = {}
+    for key, value in search_args.items():
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        params[key] = value
+    return params
+
+
+class TaskSearch(object):
+    """ Runs searchTasks and prefetches what cards are built from
+
+    The pages of results are requested concurrently, the bug of each task
+    is loaded by a bounded pool of workers while the remaining pages are
+    still arriving, and milestones are loaded once per link.
+    """
+
+    def __init__(self, project, search_args,
+                 page_size=constants.LAUNCHPAD_PAGE_SIZE,
+                 concurrency=constants.LAUNCHPAD_CONCURRENCY):
+        self.project = project
+        self.search_args = search_args
+        self.page_size = page_size
+        self.concurrency = concurrency
+        self.lock = threading.Lock()
+        self.milestones = {}
+
+    def _get_page(self, start):
+        params = _format_args(self.search_args)
+        params.update({'ws.op': 'searchTasks', 'ws.start': start,
+                       'ws.size': self.page_size})
+        return get_json('%s/%s' % (constants.LAUNCHPAD_API_URL,
+                                   self.project), params)
+
+    def _get_milestone(self, link):
+        # several hundred tasks usually share a handful of milestones,
+        # the first lookup of a link is shared by the others
+        with self.lock:
+            if link not in self.milestones:
+                self.milestones[link] = self.pool.submit(get_json, link)
+            milestone = self.milestones[link]
+        return Entry(milestone.result())
+
+    def _load_task(self, task):
+        bug = Entry(get_json(task['bug_link']))
+        milestone = None
+        if task.get('milestone_link'):
+            milestone = self._get_milestone(task['milestone_link'])
+        return Entry(task, bug=bug, milestone=milestone)
+
+    def _pages(self, page_pool):
+        first = self._get_page(0)
+        yield first
+        if 'total_size' in first:
+            # the number of results is known, request every page at once
+            pages = [page_pool.submit(self._get_page, start) for start in
+                     range(self.page_size, first['total_size'],
+                           self.page_size)]
+            for page in pages:
+                yield page.result()
+        else:
+            page = first
+            while page.get('next_collection_link'):
+                page = get_json(page['next_collection_link'])
+                yield page
+
+    def __iter__(self):
+        # milestones are fetched from the task workers, so they get a pool
+        # of their own to avoid waiting on a result that can not be scheduled
+        self.pool = futures.ThreadPoolExecutor(max_workers=2)
+        task_pool = futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        page_pool = futures.ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            pending = collections.deque()
+            for page in self._pages(page_pool):
+                pending.extend(task_pool.submit(self._load_task, task)
+                               for task in page['entries'])
+                # hand back the tasks that are ready, in order, while the
+                # next page is still loading
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            page_pool.shutdown(wait=True)
+            task_pool.shutdown(wait=True)
+            self.pool.shutdown(wait=True)
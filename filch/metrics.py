@@ -0,0 +1,397 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import collections
+import contextlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from urllib import parse
+
+from filch import constants
+
+
+# the backend a request was sent to, by host or path
+_BACKENDS = [
+    (re.compile(r'trello\.com'), 'trello'),
+    (re.compile(r'launchpad\.net'), 'launchpad'),
+    (re.compile(r'storyboard'), 'storyboard'),
+    (re.compile(r'bugzilla|/xmlrpc\.cgi|/rest/bug'), 'bugzilla'),
+    (re.compile(r'review\.|gerrit|/changes/'), 'gerrit'),
+]
+
+# path segments that identify a single object are replaced, so requests
+# for different cards, bugs or changes are counted as the same endpoint
+_IDS = re.compile(r'^([0-9a-f]{24}|\d+|I[0-9a-f]{40}|.*~.*)$')
+
+
+def classify(method, url):
+    """ Returns the backend and endpoint a request is counted under
+
+    :param method: HTTP method
+    :param url: url of the request
+    :return: (backend, endpoint) tuple, e.g. ('trello', 'PUT /1/cards/{id}')
+    """
+    parts = parse.urlsplit(url)
+    backend = parts.netloc
+    for pattern, name in _BACKENDS:
+        if pattern.search(parts.netloc + parts.path):
+            backend = name
+            break
+    # the first segment is kept, it is usually the API version
+    segments = parts.path.split('/')[:2]
+    for segment in parts.path.split('/')[2:]:
+        # launchpad names objects after a +spec, +bug, ... segment
+        if _IDS.match(segment) or segments[-1].startswith('+'):
+            segment = '{id}'
+        segments.append(segment)
+    return backend, '%s %s' % (method.upper(), '/'.join(segments))
+
+
+def _format_labels(labels):
+    return ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\')
+                                 .replace('"', '\\"'))
+                    for key, value in labels)
+
+
+class RequestStats(object):
+
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+
+    def observe(self, seconds, size, error):
+        self.requests += 1
+        self.errors += int(error)
+        self.bytes += size
+        self.seconds += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+
+    def histogram(self):
+        """ Cumulative counts by bucket upper bound, ending with +Inf """
+        cumulative = []
+        total = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return cumulative
+
+    def to_json(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 6),
+            'histogram': [[str(bound), count]
+                          for bound, count in self.histogram()],
+        }
+
+
+class Metrics(object):
+    """ Counts HTTP requests and times the phases of a sync
+
+    Requests are counted by backend (trello, bugzilla, launchpad, ...) and
+    endpoint.  Phases are timed with the phase() context manager; phases
+    running on several threads at once (e.g. source queries) add up to more
+    than the wall time of the run.
+    """
+
+    def __init__(self, buckets=constants.METRICS_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.requests = collections.OrderedDict()
+            self.phases = collections.OrderedDict()
+
+    def _stats(self, backend, endpoint):
+        key = (backend, endpoint)
+        if key not in self.requests:
+            self.requests[key] = RequestStats(self.buckets)
+        return self.requests[key]
+
+    def record(self, backend, endpoint, seconds, size=0, error=False):
+        """ Counts a request
+
+        :param backend: service the request was sent to
+        :param endpoint: method and normalized path of the request
+        :param seconds: time until the response was received
+        :param size: bytes in the response body
+        :param error: the response was an error
+        :return: None
+        """
+        with self.lock:
+            self._stats(backend, endpoint).observe(seconds, size, error)
+
+    def retry(self, backend, endpoint):
+        with self.lock:
+            self._stats(backend, endpoint).retries += 1
+
+    @contextlib.contextmanager
+    def phase(self, name, detail=None):
+        """ Times the enclosed block as part of a phase
+
+        :param name: phase, e.g. query, labels, create, update or move
+        :param detail: optional breakdown of the phase, e.g. the source type
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            elapsed = time.time() - start
+            with self.lock:
+                stats = self.phases.setdefault((name, detail), [0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+
+    def to_json(self):
+        with self.lock:
+            return {
+                'started': self.started,
+                'elapsed': round(time.time() - self.started, 6),
+                'requests': [dict(backend=backend, endpoint=endpoint,
+                                  **stats.to_json())
+                             for (backend, endpoint), stats
+                             in self.requests.items()],
+                'phases': [{'phase': name, 'detail': detail, 'count': count,
+                            'seconds': round(seconds, 6)}
+                           for (name, detail), (count, seconds)
+                           in self.phases.items()],
+            }
+
+    def to_prometheus(self):
+        """ Renders the metrics in the Prometheus text exposition format
+
+        :return: str
+        """
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append('# HELP filch_%s %s' % (name, help_text))
+            lines.append('# TYPE filch_%s %s' % (name, kind))
+            for labels, value in samples:
+                lines.append('filch_%s{%s} %s' % (
+                    name, _format_labels(labels), value))
+
+        with self.lock:
+            requests = list(self.requests.items())
+            phases = list(self.phases.items())
+            elapsed = time.time() - self.started
+
+        def by_endpoint(attr):
+            return [((('backend', backend), ('endpoint', endpoint)),
+                     getattr(stats, attr))
+                    for (backend, endpoint), stats in requests]
+
+        metric('http_requests_total', 'counter', 'HTTP requests sent.',
+               by_endpoint('requests'))
+        metric('http_errors_total', 'counter',
+               'HTTP responses with an error status.', by_endpoint('errors'))
+        metric('http_retries_total', 'counter',
+               'HTTP requests retried after a 429.', by_endpoint('retries'))
+        metric('http_response_bytes_total', 'counter',
+               'Bytes received in HTTP response bodies.',
+               by_endpoint('bytes'))
+        lines.append('# HELP filch_http_request_duration_seconds '
+                     'HTTP request latency.')
+        lines.append('# TYPE filch_http_request_duration_seconds histogram')
+        for (backend, endpoint), stats in requests:
+            labels = (('backend', backend), ('endpoint', endpoint))
+            for bound, count in stats.histogram():
+                lines.append(
+                    'filch_http_request_duration_seconds_bucket{%s} %s' % (
+                        _format_labels(labels + (('le', bound),)), count))
+            lines.append('filch_http_request_duration_seconds_sum{%s} %s'
+                         % (_format_labels(labels), stats.seconds))
+            lines.append('filch_http_request_duration_seconds_count{%s} %s'
+                         % (_format_labels(labels), stats.requests))
+        metric('phase_seconds_total', 'counter', 'Time spent in each phase.',
+               [((('phase', name), ('detail', detail or '')), seconds)
+                for (name, detail), (count, seconds) in phases])
+        metric('run_seconds', 'gauge', 'Wall time of the run.',
+               [((), elapsed)])
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """ Returns a human readable summary of the requests and phases """
+        data = self.to_json()
+        lines = ['Finished in %.1fs' % data['elapsed']]
+        totals = collections.OrderedDict()
+        for item in data['requests']:
+            total = totals.setdefault(item['backend'], collections.Counter())
+            for key in ('requests', 'errors', 'retries', 'bytes', 'seconds'):
+                total[key] += item[key]
+        for backend, total in totals.items():
+            lines.append(
+                '  %-12s %5d requests %5d errors %5d retries %10d bytes '
+                '%8.1fs' % (backend, total['requests'], total['errors'],
+                            total['retries'], total['bytes'],
+                            total['seconds']))
+        for item in sorted(data['requests'], key=lambda i: -i['seconds']):
+            lines.append('    %-50s %5d %8.1fs' % (
+                item['endpoint'], item['requests'], item['seconds']))
+        for item in data['phases']:
+            name = item['phase']
+            if item['detail']:
+                name = '%s (%s)' % (name, item['detail'])
+            lines.append('  %-40s %5d %8.1fs' % (
+                name, item['count'], item['seconds']))
+        return '\n'.join(lines)
+
+    def write(self, path):
+        """ Writes the metrics to a file
+
+        Paths ending in .json get JSON, anything else the Prometheus text
+        format (e.g. for the node_exporter textfile collector).  The file is
+        replaced atomically so a collector never reads a partial file.
+
+        :param path: file to write
+        :return: None
+        """
+        if path.endswith('.json'):
+            content = json.dumps(self.to_json(), indent=2)
+        else:
+            content = self.to_prometheus()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.filch-')
+        with os.fdopen(fd, 'w') as tmp:
+            tmp.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.rename(tmp_path, path)
+
+
+_metrics = Metrics()
+_settings = {
+    'summary': True,
+    'path': None,
+}
+# callables told about every response, e.g. the --profile HTTP trace
+_listeners = []
+
+
+def get_metrics():
+    """ Returns the process-wide metrics
+
+    :return: Metrics
+    """
+    return _metrics
+
+
+def configure(summary=None, path=None):
+    """ Change what is reported at the end of a sync
+
+    :param summary: print a summary
+    :param path: file the metrics are written to (.json or Prometheus)
+    :return: None
+    """
+    if summary is not None:
+        _settings['summary'] = summary
+    if path is not None:
+        _settings['path'] = os.path.expanduser(path)
+
+
+def reset():
+    """ Starts the metrics of a new sync, a process may run several
+
+    :return: None
+    """
+    _metrics.reset()
+
+
+def phase(name, detail=None):
+    return _metrics.phase(name, detail)
+
+
+def timed(iterable, name, detail=None):
+    """ Times the iteration of a (streaming) query as part of a phase
+
+    Only the time spent waiting for the next item is counted, not the
+    time the caller spends on each item.
+    """
+    iterator = iter(iterable)
+    while True:
+        with _metrics.phase(name, detail):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def add_listener(listener):
+    """ Registers a callable told about every response
+
+    :param listener: called with (response, backend, endpoint, seconds,
+                     size)
+    :return: None
+    """
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+def record_response(response, *args, **kwargs):
+    """ requests response hook counting every response of a session """
+    backend, endpoint = classify(response.request.method, response.url)
+    if kwargs.get('stream'):
+        size = int(response.headers.get('Content-Length') or 0)
+    else:
+        size = len(response.content or b'')
+    seconds = response.elapsed.total_seconds()
+    _metrics.record(backend, endpoint, seconds, size,
+                    response.status_code >= 400)
+    for listener in _listeners:
+        listener(response, backend, endpoint, seconds, size)
+    return response
+
+
+def record_retry(method, url):
+    _metrics.retry(*classify(method, url))
+
+
+def report():
+    """ Prints and writes the metrics as configured
+
+    :return: None
+    """
+    if _settings['summary']:
+        print(_metrics.summary())
+    if _settings['path']:
+        _metrics.write(_settings['path'])
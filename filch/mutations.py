@@ -0,0 +1,92 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+class CardMutation(object):
+    """ The desired state of a card, written with as few requests as possible
+
+    Values are compared with the card as it was loaded (see BoardSnapshot)
+    and only the fields that differ are sent: all of them in a single
+    PUT /cards/{id}, and every custom field value in a single
+    PUT /cards/{id}/customFields.  Nothing is sent for an unchanged card.
+    """
+
+    def __init__(self, card):
+        self.card = card
+        self.fields = {}
+        self.custom_fields = {}
+
+    def set(self, field, value):
+        """ Sets a card field (name, desc, idList, idLabels or due)
+
+        :param field: name of the field in the Trello API
+        :param value: desired value
+        :return: None
+        """
+        current = getattr(self.card, field, None)
+        if field == 'idLabels':
+            changed = set(current or []) != set(value)
+        else:
+            changed = current != value
+        if changed:
+            self.fields[field] = value
+
+    def set_custom_field(self, field_id, value, current=None):
+        """ Sets the value of a custom field
+
+        :param field_id: id of the custom field definition
+        :param value: desired value, e.g. {'text': 'https://...'}
+        :param current: value the card has now
+        :return: None
+        """
+        if value != current:
+            self.custom_fields[field_id] = value
+
+    @property
+    def changed(self):
+        return bool(self.fields or self.custom_fields)
+
+    def apply(self):
+        """ Sends the changes to Trello
+
+        :return: number of requests made
+        """
+        requests = 0
+        client = self.card.client
+        if self.fields:
+            post_args = dict(self.fields)
+            if 'idLabels' in post_args:
+                post_args['idLabels'] = ','.join(post_args['idLabels'])
+            client.fetch_json('/cards/' + self.card.id, http_method='PUT',
+                              post_args=post_args)
+            for field, value in self.fields.items():
+                setattr(self.card, field, value)
+            requests += 1
+        if self.custom_fields:
+            client.fetch_json(
+                '/cards/' + self.card.id + '/customFields',
+                http_method='PUT',
+                post_args={'customFieldItems': [
+                    {'idCustomField': field_id, 'value': value}
+                    for field_id, value in self.custom_fields.items()]})
+            requests += 1
+        return requests
@@ -0,0 +1,121 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from concurrent import futures
+import threading
+import time
+
+
+class Pipeline(object):
+    """ Fetches items on one thread pool and writes them on another
+
+    Each item is fetched as soon as it is read and written as soon as it
+    has been fetched.  At most `window` items are in flight at any time,
+    reading more items blocks until earlier ones are done, so items can be
+    streamed from a source of any length.
+    """
+
+    def __init__(self, fetch, write, concurrency=1, window=None,
+                 on_done=None, on_error=None):
+        """
+        :param fetch: callable returning the data for an item, or None
+                      when the items are already fetched
+        :param write: callable taking the fetched data
+        :param concurrency: number of threads for each of fetch and write
+        :param window: maximum number of items in flight
+        :param on_done: called with the item and the result of write
+        :param on_error: called with the item and the exception raised
+        """
+        self.fetch = fetch
+        self.write = write
+        self.concurrency = concurrency
+        self.window = window or concurrency * 4
+        self.on_done = on_done
+        self.on_error = on_error
+        self.lock = threading.Lock()
+        self.done = 0
+        self.failed = 0
+        self.started = None
+
+    @property
+    def elapsed(self):
+        return time.time() - self.started if self.started else 0.0
+
+    @property
+    def throughput(self):
+        """ Items completed per second """
+        elapsed = self.elapsed
+        return (self.done + self.failed) / elapsed if elapsed else 0.0
+
+    def _finish(self, item, result=None, error=None):
+        with self.lock:
+            if error is None:
+                self.done += 1
+            else:
+                self.failed += 1
+        try:
+            if error is None and self.on_done is not None:
+                self.on_done(item, result)
+            elif error is not None and self.on_error is not None:
+                self.on_error(item, error)
+        finally:
+            self.slots.release()
+
+    def _write(self, item, data):
+        try:
+            result = self.write(data)
+        except Exception as err:
+            self._finish(item, error=err)
+        else:
+            self._finish(item, result)
+
+    def _fetched(self, item, future):
+        if future.exception() is not None:
+            self._finish(item, error=future.exception())
+        else:
+            self.write_pool.submit(self._write, item, future.result())
+
+    def run(self, items):
+        """ Fetch and write every item
+
+        :param items: iterable of items, consumed lazily
+        :return: number of items written
+        """
+        self.started = time.time()
+        self.slots = threading.Semaphore(self.window)
+        self.fetch_pool = futures.ThreadPoolExecutor(self.concurrency)
+        self.write_pool = futures.ThreadPoolExecutor(self.concurrency)
+        try:
+            for item in items:
+                self.slots.acquire()
+                if self.fetch is None:
+                    self.write_pool.submit(self._write, item, item)
+                    continue
+                future = self.fetch_pool.submit(self.fetch, item)
+                future.add_done_callback(
+                    lambda future, item=item: self._fetched(item, future))
+            # every slot is free again once the last item is done
+            for _ in range(self.window):
+                self.slots.acquire()
+        finally:
+            self.fetch_pool.shutdown(wait=True)
+            self.write_pool.shutdown(wait=True)
+        return self.done
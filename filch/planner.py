@@ -0,0 +1,288 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import collections
+from concurrent import futures
+import threading
+import time
+
+from filch import constants
+from filch import data
+from filch import metrics
+
+
+def run_in_daemon_thread(task):
+    """ Runs a callable in a daemon thread
+
+    A query abandoned at its deadline can not be interrupted.  Python joins
+    the workers of a ThreadPoolExecutor at exit, so one would keep the
+    process alive until the query returns; daemon threads are not waited
+    for.
+
+    :param task: callable to run
+    :return: concurrent.futures.Future of its result
+    """
+    future = futures.Future()
+    future.set_running_or_notify_cancel()
+
+    def run():
+        try:
+            result = task()
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def canonical_url(url):
+    """ Normalizes a source url so the same artifact merges across sources
+
+    :param url: source url of a card
+    :return: normalized url
+    """
+    url = (url or '').strip().rstrip('/')
+    scheme, sep, rest = url.partition('://')
+    if not sep:
+        return url
+    host, slash, path = rest.partition('/')
+    return '%s://%s%s%s' % (scheme.lower(), host.lower(), slash, path)
+
+
+class PlannedCard(object):
+    """ A source artifact merged from every source that returned it """
+
+    def __init__(self, source, result, card_data, target_list_name):
+        self.source = source
+        self.result = result
+        self.card_data = card_data
+        self.target_list_name = target_list_name
+        self.sources = [source]
+
+    @property
+    def default_labels(self):
+        """ Labels the merged sources add to every card they return """
+        labels = []
+        for source in self.sources:
+            labels.extend(label for label in
+                          getattr(source, 'default_labels', None) or []
+                          if label not in labels)
+        return labels
+
+    def merge(self, source, card_data):
+        """ Adds the labels another source gives the artifact
+
+        The card data is replaced rather than changed, it may already be
+        in the hands of a writer.
+
+        :return: True if labels were added
+        """
+        self.sources.append(source)
+        labels = [label for label in card_data['labels']
+                  if label not in self.card_data['labels']]
+        if labels:
+            self.card_data = dict(self.card_data,
+                                  labels=self.card_data['labels'] + labels)
+        return bool(labels)
+
+
+class SyncPlan(object):
+    """ Queries the sources of a board and merges their results
+
+    Sources are queried concurrently and their results can be reconciled
+    as each query finishes.  Bugzilla searches against the same host and
+    user are combined: each search only asks for the ids of the matching
+    bugs, and the full bugs are fetched once for the union of those ids.
+    Results are merged by canonical source url, so an artifact returned
+    by several sources is reconciled once with the labels of every source
+    combined: an artifact is held back until every source that may return
+    it (see may_return) has reported or timed out.  The first source to
+    return an artifact decides its list and is used to update its card.
+    """
+
+    def __init__(self, sources, timeout=constants.SOURCE_TIMEOUT):
+        """
+        :param sources: the sources of the board
+        :param timeout: seconds a query may take, sources can override it
+                        with a timeout attribute, None waits forever
+        """
+        self.sources = sources
+        self.timeout = timeout
+        self.results = collections.OrderedDict()
+        self.planned = collections.OrderedDict()
+        self.held = collections.OrderedDict()
+        self.timed_out = []
+
+    @staticmethod
+    def _combinable(source):
+        return (type(source) is data.BugzillaURISource and
+                not source.incremental)
+
+    def _bugzilla_groups(self):
+        groups = collections.OrderedDict()
+        for source in self.sources:
+            if self._combinable(source):
+                key = (source.config['url'], source.config['user'])
+                groups.setdefault(key, []).append(source)
+        return [group for group in groups.values() if len(group) > 1]
+
+    def _query_combined(self, group):
+        with metrics.phase('query', type(group[0]).__name__):
+            return self._query_group(group)
+
+    def _query_group(self, group):
+        """ Queries Bugzilla searches on the same server together
+
+        The saved searches can not be merged into one query, each keeps its
+        own boolean chart.  Each one only asks for bug ids, and the bugs are
+        fetched once with getbugs, so N searches cost N light searches plus
+        one getbugs request per chunk of 200 distinct bugs, instead of N
+        searches returning every field of every bug.  A bug returned by
+        several searches is transferred once.
+        """
+        ids_by_source = [(source, source.query_ids()) for source in group]
+        all_ids = []
+        include_fields = []
+        for source, ids in ids_by_source:
+            all_ids.extend(ids)
+            include_fields.extend(field for field in source.include_fields
+                                  if field not in include_fields)
+        bugs = data.BugzillaIDSource(
+            group[0].config, all_ids, include_fields=include_fields,
+            sync_state=group[0].sync_state).query_by_id()
+        return [(source, [bugs[str(bug_id)] for bug_id in ids
+                          if str(bug_id) in bugs])
+                for source, ids in ids_by_source]
+
+    @staticmethod
+    def _query_source(source):
+        with metrics.phase('query', type(source).__name__):
+            return [(source, source.query())]
+
+    def tasks(self):
+        """ Splits the queries into independent tasks
+
+        :return: list of (sources, callable) tuples, the callable returns
+                 a list of (source, results) tuples
+        """
+        tasks = []
+        grouped = set()
+        for group in self._bugzilla_groups():
+            tasks.append((group, lambda group=group:
+                          self._query_combined(group)))
+            grouped.update(group)
+        for source in self.sources:
+            if source not in grouped:
+                tasks.append(([source], lambda source=source:
+                              self._query_source(source)))
+        return tasks
+
+    def _timeout(self, sources):
+        timeouts = [getattr(source, 'timeout', self.timeout)
+                    for source in sources]
+        if None in timeouts:
+            return None
+        return max(timeouts)
+
+    def start(self):
+        """ Starts every query in its own daemon thread
+
+        :return: generator of (source, results) tuples, in the order the
+                 queries finish
+        """
+        started = time.time()
+        pending = {}
+        for sources, task in self.tasks():
+            timeout = self._timeout(sources)
+            deadline = None if timeout is None else started + timeout
+            pending[run_in_daemon_thread(task)] = (sources, deadline)
+        return self._completed(pending)
+
+    def _completed(self, pending):
+        while pending:
+            deadlines = [deadline for sources, deadline in pending.values()
+                         if deadline is not None]
+            wait = None
+            if deadlines:
+                wait = max(min(deadlines) - time.time(), 0)
+            done, _ = futures.wait(list(pending), timeout=wait,
+                                   return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                for source, results in future.result():
+                    self.results[source] = results
+                    yield source, results
+            now = time.time()
+            for future, (sources, deadline) in list(pending.items()):
+                if deadline is not None and now >= deadline:
+                    # the query is left running, its results are ignored
+                    # and it does not hold up the exit of the process
+                    del pending[future]
+                    self.timed_out.extend(sources)
+
+    def add(self, source, results, board_labels):
+        """ Renders and merges the card data of a source's results
+
+        :param source: the source the results came from
+        :param results: the results of the source's query
+        :param board_labels: labels in the board
+        :return: list of PlannedCard ready to be reconciled, see release
+        """
+        for result in results:
+            card_data = source.create_card(result, board_labels)
+            # results without a source url can not be merged
+            key = (canonical_url(card_data.get('source')) or
+                   (id(source), id(result)))
+            item = self.planned.get(key)
+            if item is None:
+                item = self.planned[key] = PlannedCard(
+                    source, result, card_data, source.sort_card(result))
+                self.held[key] = item
+            elif item.merge(source, card_data):
+                self.held[key] = item
+        return self.release()
+
+    @staticmethod
+    def _may_return(source, key):
+        if not isinstance(key, str):
+            return False
+        may_return = getattr(source, 'may_return', None)
+        # sources that can not tell are waited for
+        return may_return is None or may_return(key)
+
+    def release(self):
+        """ Returns the held cards no source still being queried may return
+
+        Once every query has finished or timed out, everything held is
+        released.
+
+        :return: list of PlannedCard
+        """
+        pending = [source for source in self.sources
+                   if source not in self.results and
+                   source not in self.timed_out]
+        ready = []
+        for key, item in list(self.held.items()):
+            if not any(self._may_return(source, key) for source in pending):
+                ready.append(self.held.pop(key))
+        return ready
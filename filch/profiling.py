@@ -0,0 +1,175 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import cProfile
+import functools
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from urllib import parse
+
+import click
+
+from filch import constants
+from filch import metrics
+
+# cProfile uses sys.monitoring from Python 3.12, which sees every thread, so
+# a profiler per thread is only needed before that
+_PER_THREAD = sys.version_info < (3, 12)
+
+
+class Profiler(object):
+    """ Profiles a command, including the threads it starts
+
+    Collects cProfile stats for the calling thread and every thread started
+    while profiling (source queries and Trello writes run on thread pools),
+    the peak memory and largest allocation sites from tracemalloc, and a
+    trace of every HTTP request made through the transport sessions.
+
+    On exit the following files are written:
+
+    - path: the combined cProfile stats, readable by pstats or snakeviz
+    - path.txt: peak memory, top allocations and top functions
+    - path.http.jsonl: one JSON object per HTTP request
+    """
+
+    def __init__(self, path, top=constants.PROFILE_TOP):
+        self.path = path
+        self.top = top
+        self.profiler = cProfile.Profile()
+        self.thread_profilers = []
+        self.http_calls = []
+        self.lock = threading.Lock()
+        self.started = None
+        self.elapsed = None
+
+    def _profile_thread(self, frame, event, arg):
+        # called once by every new thread, the profiler enabled here
+        # replaces this function for the rest of the thread
+        profiler = cProfile.Profile()
+        with self.lock:
+            self.thread_profilers.append(profiler)
+        profiler.enable()
+
+    def _trace_http(self, response, backend, endpoint, seconds, size):
+        # the query string is left out, it holds the Trello key and token
+        parts = parse.urlsplit(response.url)
+        call = {
+            'start': round(time.time() - seconds - self.started, 6),
+            'thread': threading.current_thread().name,
+            'method': response.request.method,
+            'url': parse.urlunsplit(parts[:3] + ('', '')),
+            'backend': backend,
+            'endpoint': endpoint,
+            'status': response.status_code,
+            'seconds': seconds,
+            'bytes': size,
+        }
+        with self.lock:
+            self.http_calls.append(call)
+
+    def start(self):
+        self.started = time.time()
+        tracemalloc.start()
+        metrics.add_listener(self._trace_http)
+        if _PER_THREAD:
+            threading.setprofile(self._profile_thread)
+        self.profiler.enable()
+
+    def stop(self):
+        self.profiler.disable()
+        if _PER_THREAD:
+            threading.setprofile(None)
+        metrics.remove_listener(self._trace_http)
+        self.elapsed = time.time() - self.started
+        self.memory = tracemalloc.get_traced_memory()
+        self.allocations = tracemalloc.take_snapshot().statistics('lineno')
+        tracemalloc.stop()
+
+    def stats(self):
+        """ Returns the stats of all profiled threads
+
+        :return: pstats.Stats
+        """
+        stats = pstats.Stats(self.profiler)
+        with self.lock:
+            for profiler in self.thread_profilers:
+                # threads still running are included as far as they got
+                profiler.create_stats()
+                if profiler.stats:
+                    stats.add(profiler)
+        return stats
+
+    def write(self):
+        stats = self.stats()
+        stats.dump_stats(self.path)
+
+        with open(self.path + '.txt', 'w') as report:
+            current, peak = self.memory
+            report.write('Wall time: %.3fs\n' % self.elapsed)
+            report.write('HTTP requests: %d\n' % len(self.http_calls))
+            report.write('Memory: %.1f KiB at exit, %.1f KiB peak\n\n' % (
+                current / 1024.0, peak / 1024.0))
+            report.write('Top allocations:\n')
+            for stat in self.allocations[:self.top]:
+                report.write('  %s\n' % stat)
+            report.write('\n')
+            stats.stream = report
+            stats.sort_stats('cumulative').print_stats(self.top)
+
+        with open(self.path + '.http.jsonl', 'w') as trace:
+            for call in sorted(self.http_calls, key=lambda c: c['start']):
+                trace.write(json.dumps(call) + '\n')
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        self.write()
+
+
+def profile_option(command):
+    """ Adds a --profile option to a click command
+
+    Without the option the command is called directly, nothing is
+    collected.
+    """
+    @functools.wraps(command)
+    def wrapper(*args, **kwargs):
+        path = kwargs.pop('profile', None)
+        if path is None:
+            return command(*args, **kwargs)
+        try:
+            with Profiler(path):
+                return command(*args, **kwargs)
+        finally:
+            click.echo('Profile written to %s (see %s.txt and %s.http.jsonl)'
+                       % (path, path, path), err=True)
+
+    return click.option(
+        '--profile', default=None, type=click.Path(dir_okay=False),
+        help='write cProfile stats to this file, with a memory and HTTP '
+             'report next to it')(wrapper)
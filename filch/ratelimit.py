@@ -0,0 +1,143 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import time
+
+from filch import constants
+from filch import metrics
+from filch import transport
+
+
+class TokenBucket(object):
+    """ Thread-safe token bucket
+
+    Allows `limit` calls per `period` seconds, with bursts up to the
+    full allowance.
+    """
+
+    def __init__(self, limit, period):
+        self.capacity = float(limit)
+        self.rate = float(limit) / period
+        self.tokens = self.capacity
+        self.updated = time.time()
+        self.paused_until = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(now - self.updated, 0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """ Block until a token is available and take it
+
+        :return: None
+        """
+        while True:
+            with self.lock:
+                now = time.time()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """ Stop handing out tokens for a number of seconds
+
+        :param seconds: how long to wait before the next request
+        :return: None
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.time() + seconds)
+            self.tokens = 0
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(name, limit, period):
+    """ Returns the process-wide bucket for a given key or token
+
+    :param name: identifier the limit applies to
+    :param limit: number of requests allowed per period
+    :param period: length of the period in seconds
+    :return: TokenBucket
+    """
+    with _buckets_lock:
+        if name not in _buckets:
+            _buckets[name] = TokenBucket(limit, period)
+        return _buckets[name]
+
+
+def trello_buckets(api_key, token):
+    return [
+        get_bucket('key:%s' % api_key, *constants.TRELLO_KEY_RATE_LIMIT),
+        get_bucket('token:%s' % token, *constants.TRELLO_TOKEN_RATE_LIMIT),
+    ]
+
+
+class ThrottledHTTPService(object):
+    """ Wraps an HTTP service with rate limiting and 429 handling
+
+    Every request takes a token from each bucket before it is sent.  When a
+    429 is returned, all buckets are paused for the Retry-After interval (or
+    an exponential backoff if the header is missing) and the request is
+    retried.  Instances can be passed as the `http_service` of a py-trello
+    TrelloClient.  Requests are sent through the shared transport session
+    unless another HTTP service is given.
+    """
+
+    def __init__(self, http_service=None, buckets=None,
+                 max_retries=constants.TRELLO_MAX_RETRIES):
+        self.http_service = http_service or transport.get_session()
+        self.buckets = buckets or []
+        self.max_retries = max_retries
+
+    @staticmethod
+    def _retry_after(response, attempt):
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return min(2 ** attempt, 60)
+
+    def request(self, method, url, **kwargs):
+        attempt = 0
+        while True:
+            for bucket in self.buckets:
+                bucket.acquire()
+            response = self.http_service.request(method, url, **kwargs)
+            if response.status_code != 429 or attempt >= self.max_retries:
+                return response
+            wait = self._retry_after(response, attempt)
+            for bucket in self.buckets:
+                bucket.pause(wait)
+            metrics.record_retry(method, url)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
@@ -0,0 +1,170 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import collections
+
+from trello.card import Card
+from trello.checklist import Checklist
+from trello.customfield import CustomFieldDefinition
+from trello.label import Label
+from trello.trellolist import List
+
+
+class BoardSnapshot(object):
+    """ In-memory view of a Trello board
+
+    The board, its cards (with custom field items), lists, labels and
+    checklists are retrieved with a single nested GET /boards/{id} request.
+    Lookups that py-trello would normally resolve with a request per card
+    (card -> list, card -> source) are answered from the indexes built here.
+    """
+
+    def __init__(self, board, card_filter='all', source_field='source'):
+        self.board = board
+        self.client = board.client
+        self.card_filter = card_filter
+        self.source_field = source_field
+        self.refresh()
+
+    def refresh(self):
+        """ Reload the board contents and rebuild the indexes
+
+        :return: None
+        """
+        json_obj = self.client.fetch_json(
+            '/boards/' + self.board.id,
+            query_params={
+                'fields': 'name,closed,url',
+                'cards': self.card_filter,
+                'card_fields': 'all',
+                'card_customFieldItems': 'true',
+                'customFields': 'true',
+                'lists': 'all',
+                'labels': 'all',
+                'labels_limit': 1000,
+                'checklists': 'all',
+            })
+        self._load(json_obj)
+
+    def _load(self, json_obj):
+        # a board constructed from a cached id has no name yet
+        self.board.name = json_obj.get('name', self.board.name)
+        self.board.closed = json_obj.get('closed', False)
+        self.board.url = json_obj.get('url')
+        # prime the custom field definitions on the board object so
+        # py-trello does not fetch them again for every custom field item
+        self.board.customFieldDefinitions = CustomFieldDefinition.from_json_list(
+            self.board, json_obj.get('customFields', []))
+        self.custom_fields = json_obj.get('customFields', [])
+        self.source_field_id = None
+        for field in self.custom_fields:
+            if field['name'] == self.source_field:
+                self.source_field_id = field['id']
+
+        self.lists = [List.from_json(self.board, item)
+                      for item in json_obj.get('lists', [])]
+        self.lists_by_id = {item.id: item for item in self.lists}
+        self.lists_by_name = {}
+        for item in self.lists:
+            # prefer open lists when a name has been reused
+            if item.name not in self.lists_by_name or not item.closed:
+                self.lists_by_name[item.name] = item
+
+        self.labels = Label.from_json_list(self.board,
+                                           json_obj.get('labels', []))
+
+        self.checklists_by_card = collections.defaultdict(list)
+        checklists = sorted(json_obj.get('checklists', []),
+                            key=lambda checklist: checklist['pos'])
+        for cl in checklists:
+            self.checklists_by_card[cl['idCard']].append(
+                Checklist(self.client, cl, trello_card=cl['idCard']))
+
+        self.cards = []
+        self.cards_by_id = {}
+        self.cards_by_source = {}
+        self.sources_by_card = {}
+        for card_json in json_obj.get('cards', []):
+            self._add_card(Card.from_json(self.board, card_json), card_json)
+
+    def _add_card(self, card, card_json=None):
+        if card_json is None:
+            card_json = {}
+        card._checklists = self.checklists_by_card.get(card.id, [])
+        self.cards.append(card)
+        self.cards_by_id[card.id] = card
+        self._set_source(card, self._source_from_json(card_json))
+
+    def _set_source(self, card, source):
+        if source:
+            self.cards_by_source[source] = card
+            self.sources_by_card[card.id] = source
+
+    def _source_from_json(self, card_json):
+        for item in card_json.get('customFieldItems', []):
+            if item.get('idCustomField') == self.source_field_id:
+                return item.get('value', {}).get('text')
+        return None
+
+    def add_card(self, card, source=None):
+        """ Track a card that was created after the snapshot was taken
+
+        :param card: Trello Card Object
+        :param source: source url of the card, if known
+        :return: None
+        """
+        self._add_card(card)
+        self._set_source(card, source)
+
+    def add_list(self, trellolist):
+        """ Track a list that was created after the snapshot was taken
+
+        :param trellolist: Trello List Object
+        :return: None
+        """
+        self.lists.append(trellolist)
+        self.lists_by_id[trellolist.id] = trellolist
+        self.lists_by_name[trellolist.name] = trellolist
+
+    def open_lists(self):
+        return [item for item in self.lists if not item.closed]
+
+    def open_cards(self):
+        return [card for card in self.cards if not card.closed]
+
+    def get_list(self, card):
+        """ Resolve the list a card belongs to without an API call
+
+        :param card: Trello Card Object
+        :return: Trello List Object or None
+        """
+        return self.lists_by_id.get(card.idList)
+
+    def get_source(self, card):
+        """ Resolve the source url of a card without an API call
+
+        :param card: Trello Card Object
+        :return: source url or None
+        """
+        return self.sources_by_card.get(card.id)
+
+    def get_checklists(self, card):
+        return self.checklists_by_card.get(card.id, [])
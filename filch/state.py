@@ -0,0 +1,248 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import collections
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from filch import constants
+
+
+class SyncState(object):
+    """ Local record of what filch last wrote to a board
+
+    Maps each source url to the card that represents it, the list it was
+    sorted into, its labels and a hash of the card data rendered from the
+    source.  A source whose hash has not changed since the last sync does
+    not need to be pushed to Trello again.  Sources can also keep their own
+    marks (e.g. the time of their last query) between runs.
+    """
+
+    def __init__(self, path=constants.STATE_PATH):
+        self.path = path
+        if path != ':memory:' and not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        # the connection is shared by the write executor threads, all
+        # access is serialized through the lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        with self.lock, self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS cards ('
+                'board_id TEXT NOT NULL, '
+                'source TEXT NOT NULL, '
+                'card_id TEXT NOT NULL, '
+                'list_id TEXT, '
+                'labels TEXT, '
+                'content_hash TEXT, '
+                'updated REAL, '
+                'PRIMARY KEY (board_id, source))')
+            columns = [row[1] for row in self.connection.execute(
+                'PRAGMA table_info(cards)')]
+            if 'default_labels' not in columns:
+                # labels a source adds to every card, kept apart so syncs
+                # by id (see BoardManager.update_cards) keep them
+                self.connection.execute(
+                    'ALTER TABLE cards ADD COLUMN default_labels TEXT')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS comments ('
+                'board_id TEXT NOT NULL, '
+                'card_id TEXT NOT NULL, '
+                'digest TEXT NOT NULL, '
+                'PRIMARY KEY (board_id, card_id, digest))')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS bug_comments ('
+                'url TEXT NOT NULL, '
+                'bug_id TEXT NOT NULL, '
+                'changed TEXT, '
+                'comment_count INTEGER, '
+                'description TEXT, '
+                'PRIMARY KEY (url, bug_id))')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS marks ('
+                'key TEXT PRIMARY KEY, '
+                'value TEXT, '
+                'updated REAL)')
+
+    @staticmethod
+    def content_hash(card_data, target_list_name, fingerprint=None):
+        """ Hash everything a sync would write for a source artifact
+
+        :param card_data: the dictionary returned by a source's create_card
+        :param target_list_name: the list returned by a source's sort_card
+        :param fingerprint: any extra data the source's update_card uses
+        :return: hex digest
+        """
+        # the order of the labels does not matter to Trello
+        if card_data.get('labels'):
+            card_data = dict(card_data, labels=sorted(card_data['labels']))
+        payload = json.dumps(
+            {'card': card_data, 'list': target_list_name,
+             'fingerprint': fingerprint},
+            sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _row_to_dict(row):
+        return {
+            'source': row[0],
+            'card_id': row[1],
+            'list_id': row[2],
+            'labels': json.loads(row[3]) if row[3] else [],
+            'content_hash': row[4],
+            'updated': row[5],
+            'default_labels': json.loads(row[6]) if row[6] else [],
+        }
+
+    def get(self, board_id, source):
+        """ Returns the stored record for a source url, or None """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT source, card_id, list_id, labels, content_hash, '
+                'updated, default_labels FROM cards '
+                'WHERE board_id = ? AND source = ?',
+                (board_id, source)).fetchone()
+        if row is None:
+            return None
+        return self._row_to_dict(row)
+
+    def all(self, board_id):
+        """ Returns all stored records for a board keyed by source url """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT source, card_id, list_id, labels, content_hash, '
+                'updated, default_labels FROM cards WHERE board_id = ?',
+                (board_id,)).fetchall()
+        return {row[0]: self._row_to_dict(row) for row in rows}
+
+    def is_current(self, board_id, source, content_hash):
+        record = self.get(board_id, source)
+        return record is not None and record['content_hash'] == content_hash
+
+    def put(self, board_id, source, card_id, list_id=None, labels=None,
+            content_hash=None, default_labels=None):
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO cards (board_id, source, card_id, '
+                'list_id, labels, content_hash, updated, default_labels) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (board_id, source, card_id, list_id,
+                 json.dumps(sorted(labels or [])), content_hash,
+                 time.time(), json.dumps(sorted(default_labels or []))))
+
+    def forget(self, board_id, source=None):
+        """ Drop the records for a source url, or for a whole board """
+        with self.lock, self.connection:
+            if source is None:
+                self.connection.execute(
+                    'DELETE FROM cards WHERE board_id = ?', (board_id,))
+            else:
+                self.connection.execute(
+                    'DELETE FROM cards WHERE board_id = ? AND source = ?',
+                    (board_id, source))
+
+    def get_comment_digests(self, board_id):
+        """ Returns the comment digests stored for a board by card id """
+        with self.lock:
+            rows = self.connection.execute(
+                'SELECT card_id, digest FROM comments WHERE board_id = ?',
+                (board_id,)).fetchall()
+        digests = collections.defaultdict(set)
+        for card_id, digest in rows:
+            digests[card_id].add(digest)
+        return digests
+
+    def add_comment_digests(self, board_id, digests):
+        """ Stores comment digests
+
+        :param board_id: id of the board the cards are in
+        :param digests: iterable of (card id, digest) tuples
+        :return: None
+        """
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO comments (board_id, card_id, digest) '
+                'VALUES (?, ?, ?)',
+                [(board_id, card_id, digest) for card_id, digest in digests])
+
+    def get_bug_comments(self, url, bug_ids):
+        """ Returns what was last seen of the comments of some bugs
+
+        :param url: url of the bug tracker
+        :param bug_ids: ids of the bugs
+        :return: dictionary of (change time, comment count, description)
+                 tuples by bug id
+        """
+        bug_ids = [str(bug_id) for bug_id in bug_ids]
+        rows = []
+        with self.lock:
+            # stay below the sqlite limit on query parameters
+            for i in range(0, len(bug_ids), 500):
+                chunk = bug_ids[i:i + 500]
+                rows.extend(self.connection.execute(
+                    'SELECT bug_id, changed, comment_count, description '
+                    'FROM bug_comments WHERE url = ? AND bug_id IN (%s)' %
+                    ', '.join('?' * len(chunk)), [url] + chunk).fetchall())
+        return {row[0]: tuple(row[1:]) for row in rows}
+
+    def put_bug_comments(self, url, bugs):
+        """ Stores what was seen of the comments of some bugs
+
+        :param url: url of the bug tracker
+        :param bugs: iterable of (bug id, change time, comment count,
+                     description) tuples
+        :return: None
+        """
+        with self.lock, self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO bug_comments (url, bug_id, changed, '
+                'comment_count, description) VALUES (?, ?, ?, ?, ?)',
+                [(url, str(bug_id), changed, count, description)
+                 for bug_id, changed, count, description in bugs])
+
+    def get_mark(self, key, default=None):
+        """ Returns a value stored by a source between runs
+
+        :param key: identifier chosen by the source
+        :param default: returned when nothing has been stored for the key
+        :return: the stored value
+        """
+        with self.lock:
+            row = self.connection.execute(
+                'SELECT value FROM marks WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def set_mark(self, key, value):
+        """ Stores a json serializable value for a source between runs """
+        with self.lock, self.connection:
+            self.connection.execute(
+                'INSERT OR REPLACE INTO marks (key, value, updated) '
+                'VALUES (?, ?, ?)', (key, json.dumps(value), time.time()))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,95 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import calendar
+import collections
+from email import utils as email_utils
+import time
+
+from filch import constants
+from filch import transport
+
+
+def get_json(url, params=None, headers=None):
+    """ GETs a StoryBoard resource
+
+    :return: decoded json, or None when the resource was not modified
+    """
+    response = transport.get_session().get(url, params=params,
+                                           headers=headers)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
+def http_date(timestamp):
+    """ Formats a StoryBoard (UTC, ISO 8601) timestamp for HTTP headers """
+    parsed = time.strptime(timestamp[:19], '%Y-%m-%dT%H:%M:%S')
+    return email_utils.formatdate(calendar.timegm(parsed), usegmt=True)
+
+
+def get_pages(endpoint, params=None, page_size=constants.STORYBOARD_PAGE_SIZE,
+              headers=None, url=constants.STORYBOARD_API_URL):
+    """ Yields every item of a list endpoint, one page at a time
+
+    Pages are requested by id with limit and marker (the id of the last
+    item of the previous page).
+
+    :param endpoint: list endpoint, e.g. 'stories'
+    :param params: filters for the list
+    :param page_size: number of items requested per page
+    :param headers: headers sent with the first page (e.g. If-Modified-Since)
+    :param url: url of the StoryBoard API
+    :return: generator of items
+    """
+    params = dict(params or {}, limit=page_size, sort_field='id',
+                  sort_dir='asc')
+    while True:
+        items = get_json('%s/%s' % (url, endpoint), params, headers)
+        if not items:
+            return
+        for item in items:
+            yield item
+        if len(items) < page_size:
+            return
+        params = dict(params, marker=items[-1]['id'])
+        headers = None
+
+
+def get_project_group_id(name, url=constants.STORYBOARD_API_URL):
+    groups = get_json('%s/project_groups' % url, {'name': name})
+    for group in groups:
+        if group['name'] == name:
+            return group['id']
+    raise ValueError('StoryBoard project group "%s" not found' % name)
+
+
+def get_task_statuses(project_group_id, url=constants.STORYBOARD_API_URL):
+    """ Counts the task statuses of every story in a project group
+
+    :return: dictionary of {status: count} dictionaries by story id
+    """
+    statuses = collections.defaultdict(collections.Counter)
+    for task in get_pages('tasks', {'project_group_id': project_group_id},
+                          url=url):
+        statuses[task['story_id']][task['status']] += 1
+    return statuses
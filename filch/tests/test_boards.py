@@ -0,0 +1,366 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import copy
+import itertools
+
+import mock
+import pytest
+from trello import exceptions as trello_exceptions
+
+from filch import boards
+from filch import data
+from filch import exceptions as peeves
+from filch import metrics
+from filch import state
+
+
+class FakeTrello(object):
+    """ Just enough of the Trello API for a BoardManager to sync a board
+
+    Used both as the TrelloClient and as the HTTP service of the manager,
+    every write is recorded in writes.
+    """
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.lists = [{'id': 'list-%s' % name, 'name': name,
+                       'closed': False, 'pos': pos}
+                      for pos, name in enumerate(
+                          ['Complete', 'In Progress', 'Features', 'Bugs'])]
+        self.labels = []
+        self.cards = {}
+        self.writes = []
+
+    def _new_id(self, prefix):
+        return '%s%d' % (prefix, next(self.ids))
+
+    def add_label(self, name, color):
+        label = {'id': self._new_id('label'), 'name': name, 'color': color}
+        self.labels.append(label)
+        return label['id']
+
+    def label_names(self, card):
+        names = dict((label['id'], label['name']) for label in self.labels)
+        return sorted(names[label_id] for label_id in card['idLabels'])
+
+    def fetch_json(self, uri, http_method='GET', headers=None,
+                   query_params=None, post_args=None, files=None):
+        if http_method == 'GET' and uri.endswith('/labels'):
+            return copy.deepcopy(self.labels)
+        if http_method == 'GET':
+            return copy.deepcopy({
+                'id': 'board1', 'name': 'DFG', 'closed': False, 'url': '',
+                'customFields': [
+                    {'id': 'field1', 'name': 'source', 'type': 'text'}],
+                'lists': self.lists,
+                'labels': self.labels,
+                'cards': list(self.cards.values()),
+                'checklists': [],
+            })
+        self.writes.append((http_method, uri, post_args))
+        if uri == '/labels':
+            label_id = self.add_label(post_args['name'], post_args['color'])
+            return dict(self.labels[-1], id=label_id)
+        if uri == '/lists':
+            item = {'id': self._new_id('list'), 'name': post_args['name'],
+                    'closed': False, 'pos': len(self.lists)}
+            self.lists.append(item)
+            return item
+        if uri == '/cards':
+            return self.add_card(post_args['name'], post_args['idList'],
+                                 post_args['idLabels'].split(',')
+                                 if post_args['idLabels'] else [],
+                                 desc=post_args['desc'])
+        card = self.cards[uri.split('/')[2]]
+        if uri.endswith('/customFields'):
+            card['customFieldItems'] = [
+                {'id': 'item-%s' % card['id'],
+                 'idCustomField': item['idCustomField'],
+                 'value': item['value']}
+                for item in post_args['customFieldItems']]
+            return {}
+        if uri.endswith('/closed'):
+            return {}
+        for field, value in post_args.items():
+            if field == 'idLabels':
+                value = value.split(',') if value else []
+            card[field] = value
+        return card
+
+    def add_card(self, name, list_id, label_ids, desc='', source=None):
+        card_id = self._new_id('card')
+        card = {
+            'id': card_id, 'name': name, 'desc': desc, 'due': None,
+            'closed': False, 'dueComplete': False, 'url': '', 'pos': 1,
+            'shortUrl': '',
+            'idMembers': [], 'idLabels': list(label_ids), 'idBoard': 'board1',
+            'idList': list_id, 'idShort': 1, 'idChecklists': [],
+            'badges': {'checkItems': 0, 'comments': 0}, 'labels': [],
+            'dateLastActivity': '2018-11-01T00:00:00.000Z',
+            'customFieldItems': [],
+        }
+        if source:
+            card['customFieldItems'].append(
+                {'id': 'item-%s' % card_id, 'idCustomField': 'field1',
+                 'value': {'text': source}})
+        self.cards[card_id] = card
+        return copy.deepcopy(card)
+
+    def request(self, method, url, params=None, json=None):
+        # BoardManager.set_custom_field
+        self.writes.append((method, url, json))
+        card_id = url.split('/card/')[1].split('/')[0]
+        self.cards[card_id]['customFieldItems'] = [
+            {'id': 'item-%s' % card_id, 'idCustomField': 'field1',
+             'value': json['value']}]
+        return mock.Mock(status_code=200, text='{}')
+
+
+class FakeSource(object):
+
+    def __init__(self, labels, items=('1',)):
+        self.labels = labels
+        self.items = items
+
+    def query(self):
+        return list(self.items)
+
+    def get_labels(self, results):
+        return {'green': list(self.labels)}
+
+    def sort_card(self, result):
+        return 'Bugs'
+
+    def create_card(self, result, labels):
+        return {'name': 'bug %s' % result, 'description': 'bug',
+                'labels': list(self.labels), 'date_due': None,
+                'source': 'https://bugs.example.com/%s' % result}
+
+    def update_card(self, result, card, labels):
+        pass
+
+
+class FakeBugzillaSource(FakeSource):
+
+    url = 'https://bugzilla.example.com/show_bug.cgi?id=%s'
+
+    def __init__(self, labels, default_labels=()):
+        super(FakeBugzillaSource, self).__init__(
+            labels, items=[mock.Mock(id='1', weburl=self.url % '1')])
+        self.default_labels = list(default_labels)
+
+    def query_stream(self):
+        return iter(self.query())
+
+    def create_card(self, result, labels):
+        return {'name': 'bug %s' % result.id, 'description': 'bug',
+                'labels': list(self.labels) + self.default_labels,
+                'date_due': None, 'source': result.weburl}
+
+
+def make_board(board_id, name):
+    board = mock.Mock()
+    board.id = board_id
+    board.name = name
+    return board
+
+
+class TestFindBoard(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+        self.client = mock.Mock()
+        self.client.list_boards.return_value = [
+            make_board('other', 'Other'), make_board('board1', 'DFG')]
+
+    def teardown_method(self):
+        self.state.close()
+
+    def test_cached_id(self):
+        board = boards.find_board(self.client, 'DFG', self.state)
+        assert board.id == 'board1'
+        board = boards.find_board(self.client, 'DFG', self.state)
+        assert board.id == 'board1'
+        assert board.name == 'DFG'
+        assert self.client.list_boards.call_count == 1
+
+    def test_missing(self):
+        assert boards.find_board(self.client, 'New', self.state) is None
+        self.client.add_board.return_value = make_board('board2', 'New')
+        board = boards.find_board(self.client, 'New', self.state, create=True)
+        assert board.id == 'board2'
+        assert self.state.get_mark(boards._board_key('New')) == 'board2'
+
+    def test_load_stale_id(self):
+        self.state.set_mark(boards._board_key('DFG'), 'deleted')
+
+        def load(board):
+            if board.id == 'deleted':
+                raise trello_exceptions.ResourceUnavailable('gone', mock.Mock())
+            return board.id
+
+        board, result = boards.load_board(self.client, 'DFG', self.state,
+                                          load)
+        assert result == 'board1'
+        assert self.state.get_mark(boards._board_key('DFG')) == 'board1'
+
+    def test_load_missing(self):
+        with pytest.raises(peeves.MissingBoardException):
+            boards.load_board(self.client, 'New', self.state, mock.Mock())
+
+
+class TestBoardManager(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+
+    def teardown_method(self):
+        self.state.close()
+
+    @mock.patch('filch.boards.trelloclient.TrelloClient')
+    def test_lazy_initialization(self, mock_client):
+        config = {'api_key': 'key', 'access_token': 'token'}
+        manager = boards.BoardManager(config, board_id='board1',
+                                      sync_state=self.state)
+        assert manager.board.id == 'board1'
+        assert not manager.initialized
+        assert not mock_client.return_value.list_boards.called
+        assert not mock_client.return_value.fetch_json.called
+
+
+class TestBoardManagerSync(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+        self.trello = FakeTrello()
+
+    def teardown_method(self):
+        self.state.close()
+
+    def manager(self, *sources):
+        with mock.patch.object(boards.BoardManager, 'get_client',
+                               return_value=self.trello):
+            manager = boards.BoardManager(
+                {'api_key': 'key', 'access_token': 'token'},
+                board_id='board1', sync_state=self.state)
+        manager.http = self.trello
+        manager.sources = list(sources)
+        return manager
+
+    def run(self, *sources):
+        manager = self.manager(*sources)
+        del self.trello.writes[:]
+        manager.run()
+        return manager
+
+    def card_writes(self):
+        return [write for write in self.trello.writes
+                if '/card' in write[1]]
+
+    def test_overlapping_sources(self):
+        self.run(FakeSource(['High']), FakeSource(['Sprint 1']))
+        card, = self.trello.cards.values()
+        assert self.trello.label_names(card) == ['High', 'Sprint 1']
+
+        for _ in range(2):
+            self.run(FakeSource(['High']), FakeSource(['Sprint 1']))
+            assert self.card_writes() == []
+        assert self.trello.label_names(card) == ['High', 'Sprint 1']
+
+    def test_marks_of_abandoned_queries(self):
+        fast = mock.Mock(spec=data.IncrementalSource)
+        slow = mock.Mock(spec=data.IncrementalSource)
+        manager = self.manager(fast, slow)
+        manager._commit_marks(mock.Mock(timed_out=[slow]))
+        fast.commit_mark.assert_called_once_with()
+        assert not slow.commit_mark.called
+
+    def test_labels_without_color(self):
+        # Trello returns a null color for labels created without one
+        self.trello.add_label('Plain', None)
+        manager = self.manager()
+        for _ in range(2):
+            assert manager.add_labels({'null': ['Plain']}) == []
+        assert self.trello.writes == []
+
+    def test_metrics_of_each_run(self):
+        def phases():
+            return [item['phase'] for item in
+                    metrics.get_metrics().to_json()['phases']]
+
+        manager = self.manager(FakeSource(['High']))
+        with mock.patch.object(metrics, 'report'):
+            for sync in (lambda: manager.update_cards({}), manager.run):
+                with metrics.phase('earlier run'):
+                    pass
+                sync()
+                assert 'earlier run' not in phases()
+                assert 'load' in phases()
+
+    def test_stale_labels_removed(self):
+        self.run(FakeSource(['High', 'Sprint 1']))
+        card, = self.trello.cards.values()
+        # a label added by hand in Trello
+        card['idLabels'].append(self.trello.add_label('Mine', 'blue'))
+
+        self.run(FakeSource(['High']))
+
+        assert self.trello.label_names(card) == ['High', 'Mine']
+        # name, list and labels are written together
+        assert [write[:2] for write in self.card_writes()] == [
+            ('PUT', '/cards/%s' % card['id'])]
+
+    def test_unchanged_items_skipped(self):
+        self.run(FakeSource(['High']))
+        assert len(self.trello.cards) == 1
+
+        self.run(FakeSource(['High']))
+
+        assert self.trello.writes == []
+
+    def test_card_found_by_stored_id(self):
+        self.run(FakeSource(['High']))
+        card, = self.trello.cards.values()
+        # the source field was cleared on the card
+        card['customFieldItems'] = []
+
+        self.run(FakeSource(['Low']))
+
+        assert list(self.trello.cards) == [card['id']]
+        assert self.trello.label_names(card) == ['Low']
+        assert card['customFieldItems'][0]['value'] == {
+            'text': 'https://bugs.example.com/1'}
+
+    def test_default_labels_kept_by_id_updates(self):
+        self.run(FakeBugzillaSource(['High'], default_labels=['Bug']))
+        card, = self.trello.cards.values()
+        assert self.trello.label_names(card) == ['Bug', 'High']
+
+        manager = self.manager()
+        del self.trello.writes[:]
+        # syncs by id do not know the labels of the importing source
+        with mock.patch.object(data, 'BugzillaIDSource',
+                               return_value=FakeBugzillaSource(['High'])):
+            manager.update_cards({'bugzilla': {'redhat': 'url'}})
+
+        assert self.trello.label_names(card) == ['Bug', 'High']
+        assert self.trello.writes == []
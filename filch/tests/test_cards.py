@@ -20,7 +20,6 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import mock
-import trello
 
 from filch import cards
 
@@ -31,7 +30,7 @@ class TestCards(object):
         self.mock_list.name = "New"
 
     def test_create_card(self):
-        self.mock_list.list_cards.return_value = []
+        self.mock_list.client.fetch_json.return_value = []
 
         cards.create_card(target_list=self.mock_list,
                           title="test_card",
@@ -42,9 +41,8 @@ class TestCards(object):
             "test_card", "test_card_desc", ["test_label"], "null")
 
     def test_create_card_duplicate(self):
-        duplicate_card = trello.Card(self.mock_list, None, "test_card")
-        duplicate_card.description = "duplicate card"
-        self.mock_list.list_cards.return_value = [duplicate_card]
+        self.mock_list.client.fetch_json.return_value = [
+            {'name': 'test_card', 'desc': 'duplicate card'}]
 
         cards.create_card(target_list=self.mock_list,
                           title="test_card",
@@ -52,3 +50,25 @@ class TestCards(object):
                           labels=["test_label"],
                           due="null")
         self.mock_list.add_card.assert_not_called()
+
+    def test_index(self):
+        self.mock_list.client.fetch_json.return_value = [
+            {'name': 'old title', 'desc': 'text\nsource: bz|1\n'},
+            {'name': 'other', 'desc': '', 'customFieldItems': [
+                {'value': {'text': 'https://example.com/2'}}]}]
+        index = cards.CardIndex(self.mock_list)
+
+        # same source, different title
+        assert cards.create_card(self.mock_list, "new title",
+                                 "text\nsource: bz|1\n",
+                                 index=index) is None
+        assert cards.create_card(self.mock_list, "two", "",
+                                 source='https://example.com/2',
+                                 index=index) is None
+        assert cards.create_card(self.mock_list, "three", "source: bz|3",
+                                 index=index) is not None
+        # cards created through the index are added to it
+        assert cards.create_card(self.mock_list, "three", "source: bz|3",
+                                 index=index) is None
+        assert self.mock_list.add_card.call_count == 1
+        assert self.mock_list.client.fetch_json.call_count == 1
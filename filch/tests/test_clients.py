@@ -0,0 +1,73 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+
+import mock
+
+from filch import clients
+
+
+class TestGetBugzilla(object):
+
+    def setup_method(self):
+        clients._local.__dict__.pop('bugzilla', None)
+        clients._bugzilla_logins.clear()
+        self.patcher = mock.patch('bugzilla.Bugzilla44')
+        self.bugzilla = self.patcher.start()
+
+    def teardown_method(self):
+        self.patcher.stop()
+        clients._local.__dict__.pop('bugzilla', None)
+        clients._bugzilla_logins.clear()
+
+    def test_login_once(self):
+        self.bugzilla.return_value.logged_in = False
+        first = clients.get_bugzilla('https://bz.example.com', 'user', 'pw')
+        second = clients.get_bugzilla('https://bz.example.com', 'user', 'pw')
+        assert first is second
+        first.login.assert_called_once_with('user', 'pw')
+        kwargs = self.bugzilla.call_args[1]
+        assert 'password' not in kwargs
+        assert kwargs['tokenfile'].endswith('bz.example.com-user')
+
+    def test_stored_token(self):
+        self.bugzilla.return_value.logged_in = True
+        client = clients.get_bugzilla('https://bz.example.com', 'user', 'pw')
+        assert not client.login.called
+
+    def test_anonymous(self):
+        self.bugzilla.return_value.logged_in = False
+        client = clients.get_bugzilla('https://bz.example.com', 'user', None)
+        assert not client.login.called
+
+    def test_client_per_thread(self):
+        self.bugzilla.side_effect = lambda **kwargs: mock.MagicMock(
+            logged_in=False)
+        results = []
+        worker = threading.Thread(target=lambda: results.append(
+            clients.get_bugzilla('https://bz.example.com', 'user', 'pw')))
+        worker.start()
+        worker.join()
+        client = clients.get_bugzilla('https://bz.example.com', 'user', 'pw')
+        assert client is not results[0]
+        results[0].login.assert_called_once_with('user', 'pw')
+        assert not client.login.called
@@ -0,0 +1,76 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import comments
+from filch import state
+
+
+def comment_action(action_id, card_id, text):
+    return {'id': action_id, 'date': '2018-11-01T00:00:00.000Z',
+            'data': {'card': {'id': card_id}, 'text': text}}
+
+
+class TestCommentIndex(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+        self.board = mock.MagicMock(id='board1')
+        self.client = self.board.client
+
+    def teardown_method(self):
+        self.state.close()
+
+    def test_paginates(self):
+        self.client.fetch_json.side_effect = [
+            [comment_action('a3', 'card1', 'three'),
+             comment_action('a2', 'card2', 'two')],
+            [comment_action('a1', 'card1', 'one')],
+        ]
+        with mock.patch.object(comments.CommentIndex, 'page_size', 2):
+            index = comments.CommentIndex(self.board, self.state)
+        assert index.contains('card1', 'one')
+        assert index.contains('card1', 'three')
+        assert index.contains('card2', 'two')
+        assert not index.contains('card2', 'one')
+        second_page = self.client.fetch_json.call_args_list[1][1]
+        assert second_page['query_params']['before'] == 'a2'
+        assert self.state.get_mark(index.mark_key) == 'a3'
+
+    def test_loads_since_last_run(self):
+        self.client.fetch_json.return_value = [
+            comment_action('a1', 'card1', 'first  comment\n')]
+        comments.CommentIndex(self.board, self.state)
+
+        self.client.fetch_json.return_value = []
+        index = comments.CommentIndex(self.board, self.state)
+        query_params = self.client.fetch_json.call_args[1]['query_params']
+        assert query_params['since'] == 'a1'
+        # digests from the previous run are kept in the sync state
+        assert index.contains('card1', 'first comment')
+
+    def test_add(self):
+        self.client.fetch_json.return_value = []
+        index = comments.CommentIndex(self.board, self.state)
+        index.add('card1', 'new comment')
+        assert index.contains('card1', 'new comment')
+        assert self.state.get_comment_digests('board1')['card1']
@@ -0,0 +1,344 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+
+import mock
+import trello
+
+from filch import data
+from filch import state
+
+
+bz_config = {
+    'url': 'https://bugzilla.example.com/xmlrpc.cgi',
+    'user': 'user',
+    'password': 'password',
+    'sslverify': True,
+}
+
+
+def make_bug(bug_id, last_change_time):
+    return mock.MagicMock(id=bug_id, last_change_time=last_change_time)
+
+
+class TestBugzillaURISource(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+        self.patcher = mock.patch.object(data.BugzillaURISource, 'get_client')
+        self.client = self.patcher.start().return_value
+        self.client.url_to_query.side_effect = lambda uri: {'product': 'x'}
+        self.source = data.BugzillaURISource(
+            bz_config, 'https://bugzilla.example.com/buglist.cgi?product=x',
+            ['id', 'status'], incremental=True, sync_state=self.state)
+
+    def teardown_method(self):
+        self.patcher.stop()
+        self.state.close()
+
+    def test_first_query_is_full(self):
+        self.client.query.return_value = [
+            make_bug(1, '2018-11-01T00:00:00Z'),
+            make_bug(2, '2018-11-02T00:00:00Z')]
+        results = self.source.query()
+        assert len(results) == 2
+        query = self.client.query.call_args[0][0]
+        assert 'last_change_time' not in query
+        assert 'last_change_time' in query['include_fields']
+        # the mark is only stored once the cards have been written
+        assert self.state.get_mark(self.source.mark_key) is None
+        self.source.commit_mark()
+        mark = self.state.get_mark(self.source.mark_key)
+        assert mark == {'since': '2018-11-02T00:00:00Z', 'members': [1, 2]}
+
+    def test_mark_per_board(self):
+        self.source.board_id = 'board1'
+        other = data.BugzillaURISource(
+            bz_config, self.source.uri, ['id'], incremental=True,
+            sync_state=self.state)
+        other.board_id = 'board2'
+        assert self.source.mark_key != other.mark_key
+
+    def test_delta_query(self):
+        self.state.set_mark(self.source.mark_key, {
+            'since': '2018-11-02T00:00:00Z', 'members': [1, 2]})
+        changed = make_bug(3, '2018-11-03T00:00:00Z')
+        dropped = make_bug(2, '2018-11-04T00:00:00Z')
+        self.client.query.side_effect = [[changed], [dropped]]
+
+        results = self.source.query()
+
+        assert results == [changed, dropped]
+        delta_query, dropped_query = [
+            c[0][0] for c in self.client.query.call_args_list]
+        assert delta_query['last_change_time'] == '2018-11-02T00:00:00Z'
+        assert dropped_query['id'] == [1, 2]
+        self.source.commit_mark()
+        mark = self.state.get_mark(self.source.mark_key)
+        assert mark == {'since': '2018-11-04T00:00:00Z', 'members': [1, 3]}
+
+
+class TestUpdateTrackers(object):
+
+    def setup_method(self):
+        self.card = mock.MagicMock(id='card1')
+        self.card.client.fetch_json.return_value = {
+            'id': 'new-item', 'name': 'added'}
+
+    def make_checklist(self, names):
+        checklist = trello.Checklist(self.card.client, {
+            'id': 'cl1', 'name': 'External Trackers',
+            'checkItems': [{'id': 'item-%s' % name, 'name': name,
+                            'state': 'incomplete', 'pos': i}
+                           for i, name in enumerate(names)]})
+        self.card.checklists = [checklist]
+        return checklist
+
+    def test_unchanged(self):
+        self.make_checklist(['https://a/1', 'https://b/2'])
+        data.BugzillaURISource.update_trackers(
+            self.card, ['https://b/2', 'https://a/1'])
+        self.card.client.fetch_json.assert_not_called()
+
+    def test_diff(self):
+        checklist = self.make_checklist(['https://a/1', 'https://b/2'])
+        data.BugzillaURISource.update_trackers(
+            self.card, ['https://a/1', 'https://c/3'])
+        calls = [(c[0][0], c[1]['http_method'])
+                 for c in self.card.client.fetch_json.call_args_list]
+        assert calls == [
+            ('/checklists/cl1/checkItems/item-https://b/2', 'DELETE'),
+            ('/checklists/cl1/checkItems', 'POST'),
+        ]
+        assert len(checklist.items) == 2
+
+    def test_no_trackers_no_checklist(self):
+        self.card.checklists = []
+        data.BugzillaURISource.update_trackers(self.card, [])
+        self.card.client.fetch_json.assert_not_called()
+
+
+class TestLaunchpadBugIDSource(object):
+
+    def test_query(self):
+        launchpad = mock.MagicMock()
+        bugs = {}
+        for bug_id in ['1', '2', '3']:
+            bugs[bug_id] = mock.MagicMock(id=bug_id)
+            bugs[bug_id].bug_tasks = [mock.MagicMock(status='New')]
+            bugs[bug_id].bug_tasks[0].milestone.name = 'stein-%s' % bug_id
+        bugs['3'].bug_tasks[0].milestone = None
+        launchpad.bugs.__getitem__.side_effect = bugs.get
+        threads = []
+
+        def get_launchpad():
+            threads.append(threading.current_thread())
+            return launchpad
+
+        with mock.patch('filch.clients.get_launchpad',
+                        side_effect=get_launchpad):
+            source = data.LaunchpadBugIDSource(['1', '2', '3'],
+                                               concurrency=2)
+            results = source.query()
+        # logged in on the calling thread before the workers start
+        assert threads[0] is threading.current_thread()
+        # results keep the order of the ids
+        assert [task.bug.id for task in results] == ['1', '2', '3']
+        assert results[0].status == 'New'
+        # milestones are read in the workers, not by create_card
+        assert results[0].milestone.name == 'stein-1'
+        assert results[2].milestone is None
+        bugs['1'].bug_tasks[0].milestone.name = 'rocky-1'
+        board_labels = [trello.Label(None, 'label1', 'Stein (Stein)', 'blue')]
+        card = source.create_card(results[0], board_labels)
+        assert card['labels'] == ['Stein (Stein)']
+
+
+class TestBugzillaIDSource(object):
+
+    def setup_method(self):
+        self.patcher = mock.patch.object(data.BugzillaURISource, 'get_client')
+        self.get_client = self.patcher.start()
+        self.get_client.return_value.getbugs.side_effect = (
+            lambda ids, include_fields=None: [
+                mock.MagicMock(id=int(bug_id)) if bug_id != '4' else None
+                for bug_id in ids])
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    def test_chunks(self):
+        source = data.BugzillaIDSource(bz_config, ['1', '2', '2', '3', '4'],
+                                       chunk_size=2)
+        assert source.chunks() == [['1', '2'], ['3', '4']]
+
+    def test_query(self):
+        source = data.BugzillaIDSource(bz_config, ['3', '1', '2', '4', '1'],
+                                       include_fields=['id', 'status'],
+                                       chunk_size=2, concurrency=2)
+        results = source.query()
+        assert [bz.id for bz in results] == [3, 1, 2]
+        assert sorted(source.query_by_id().keys()) == ['1', '2', '3']
+        # repeated queries do not change the source
+        assert [bz.id for bz in source.query()] == [3, 1, 2]
+        getbugs = self.get_client.return_value.getbugs
+        assert getbugs.call_args[1]['include_fields'] == source.query_fields()
+
+
+class TestFieldProjection(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+        self.patcher = mock.patch.object(data.BugzillaURISource, 'get_client')
+        self.client = self.patcher.start().return_value
+        self.client.get_comments.side_effect = lambda ids: {'bugs': {
+            str(bug_id): {'comments': [{'text': 'description %s' % bug_id},
+                                       {'text': 'comment'}]}
+            for bug_id in ids}}
+        self.source = data.BugzillaURISource(bz_config, 'uri', ['keywords'],
+                                             sync_state=self.state)
+
+    def teardown_method(self):
+        self.patcher.stop()
+        self.state.close()
+
+    def test_query_fields(self):
+        fields = self.source.query_fields()
+        assert 'comments' not in fields
+        assert 'information_type' not in fields
+        assert fields.count('keywords') == 1
+        assert {'id', 'last_change_time', 'status', 'external_bugs'} <= set(
+            fields)
+        self.source.sync_state = None
+        assert 'comments' in self.source.query_fields()
+
+    def test_load_comments(self):
+        bugs = [make_bug(1, '2018-11-01T00:00:00Z'),
+                make_bug(2, '2018-11-01T00:00:00Z')]
+        self.source.load_comments(bugs)
+        assert bugs[0].description == 'description 1'
+        assert bugs[0].comment_count == 2
+
+        # only the bug that changed is sent to Bugzilla again
+        bugs = [make_bug(1, '2018-11-01T00:00:00Z'),
+                make_bug(2, '2018-11-02T00:00:00Z')]
+        self.source.load_comments(bugs)
+        self.client.get_comments.assert_called_with([2])
+        assert bugs[0].description == 'description 1'
+        assert bugs[0].comment_count == 2
+        assert bugs[1].comments[1]['text'] == 'comment'
+
+
+def make_change(number, updated, status='NEW'):
+    return {'_number': number, 'updated': updated + '.000000000',
+            'status': status, 'subject': 'change %s' % number,
+            'project': 'openstack/filch'}
+
+
+class TestGerritQuerySource(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+        self.source = data.GerritQuerySource(
+            'https://review.example.com', 'project:openstack/filch',
+            sync_state=self.state)
+
+    def teardown_method(self):
+        self.state.close()
+
+    @mock.patch('filch.gerrit.get_changes')
+    @mock.patch('filch.gerrit.query_changes')
+    def test_incremental(self, query_changes, get_changes):
+        query_changes.return_value = iter([
+            make_change(1, '2018-11-01 10:00:00'),
+            make_change(2, '2018-11-02 10:00:00')])
+        assert len(self.source.query()) == 2
+        assert query_changes.call_args[0][1] == 'project:openstack/filch'
+        assert self.state.get_mark(self.source.mark_key) is None
+        self.source.commit_mark()
+
+        merged = make_change(2, '2018-11-04 10:00:00', 'MERGED')
+        query_changes.return_value = iter([
+            make_change(3, '2018-11-03 10:00:00')])
+        get_changes.return_value = iter([merged])
+        results = self.source.query()
+
+        assert [change['_number'] for change in results] == [3, 2]
+        assert query_changes.call_args[0][1] == (
+            '(project:openstack/filch) after:"2018-11-02 10:00:00"')
+        assert get_changes.call_args[0][1] == [1, 2]
+        assert get_changes.call_args[1]['query'] == (
+            'after:"2018-11-02 10:00:00"')
+        self.source.commit_mark()
+        assert self.state.get_mark(self.source.mark_key) == {
+            'since': '2018-11-04 10:00:00', 'members': [1, 3]}
+
+    def test_create_card(self):
+        change = make_change(5, '2018-11-01 10:00:00', 'MERGED')
+        card_data = self.source.create_card(change)
+        assert card_data['source'] == 'https://review.example.com/#/c/5/'
+        assert 'url: https://review.example.com/#/c/5/' in (
+            card_data['description'])
+        assert self.source.sort_card(change) == 'Complete'
+
+
+class TestStoryBoardSource(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+
+    def teardown_method(self):
+        self.state.close()
+
+    @mock.patch('filch.storyboard.get_task_statuses')
+    @mock.patch('filch.storyboard.get_pages')
+    @mock.patch('filch.storyboard.get_project_group_id')
+    def test_query(self, get_project_group_id, get_pages, get_task_statuses):
+        get_project_group_id.return_value = 5
+        get_task_statuses.return_value = {1: {'inprogress': 1}}
+        get_pages.return_value = iter([
+            {'id': 1, 'title': 'one', 'description': '', 'status': 'active',
+             'created_at': '2018-11-01T00:00:00+00:00', 'updated_at': None},
+            {'id': 2, 'title': 'two', 'description': '', 'status': 'active',
+             'created_at': '2018-11-01T00:00:00+00:00',
+             'updated_at': '2018-11-03T00:00:00+00:00'}])
+        source = data.StoryBoardSource('tripleo', sync_state=self.state)
+
+        stories = source.query()
+
+        assert [source.sort_card(story) for story in stories] == [
+            'In Progress', 'Features']
+        get_task_statuses.assert_called_once_with(5, url=source.url)
+        assert get_pages.call_args[0][1] == {'project_group_id': 5}
+        assert self.state.get_mark(source.mark_key) is None
+        source.commit_mark()
+        assert (self.state.get_mark(source.mark_key) ==
+                '2018-11-03T00:00:00+00:00')
+        card_data = source.create_card(stories[0])
+        assert card_data['source'] == (
+            'https://storyboard.openstack.org/#!/story/1')
+
+        get_pages.return_value = iter([])
+        assert source.query() == []
+        assert get_pages.call_args[0][1]['updated_since'] == (
+            '2018-11-03T00:00:00+00:00')
+        assert 'If-Modified-Since' in get_pages.call_args[1]['headers']
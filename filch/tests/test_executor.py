@@ -0,0 +1,68 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import time
+
+from filch import executor
+
+
+class TestWriteExecutor(object):
+
+    def test_inline(self):
+        calls = []
+        with executor.WriteExecutor() as writer:
+            future = writer.submit('a', calls.append, 1)
+            assert calls == [1]
+        assert future.done()
+
+    def test_same_key_keeps_order(self):
+        calls = []
+
+        def write(value):
+            time.sleep(0.01)
+            calls.append(value)
+
+        with executor.WriteExecutor(concurrency=4) as writer:
+            for value in range(10):
+                writer.submit('card', write, value)
+        assert calls == list(range(10))
+
+    def test_different_keys_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        with executor.WriteExecutor(concurrency=2) as writer:
+            writer.submit('card1', barrier.wait)
+            writer.submit('card2', barrier.wait)
+
+    def test_join_raises(self):
+        def fail():
+            raise ValueError('failed')
+
+        writer = executor.WriteExecutor(concurrency=2)
+        writer.submit('card', fail)
+        try:
+            writer.join()
+        except ValueError:
+            pass
+        else:
+            assert False, 'join() did not raise'
+        finally:
+            writer.shutdown()
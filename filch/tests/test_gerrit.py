@@ -0,0 +1,63 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import gerrit
+
+
+def make_response(text):
+    return mock.MagicMock(text=text)
+
+
+class TestGerrit(object):
+
+    def setup_method(self):
+        self.patcher = mock.patch('filch.transport.get_session')
+        self.get = self.patcher.start().return_value.get
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    def test_query_changes_pages(self):
+        self.get.side_effect = [
+            make_response(")]}'\n" + '[{"_number": 1}, '
+                          '{"_number": 2, "_more_changes": true}]'),
+            make_response(")]}'\n" + '[{"_number": 3}]')]
+        changes = list(gerrit.query_changes('https://review.example.com/',
+                                            'topic:x', page_size=2))
+        assert [change['_number'] for change in changes] == [1, 2, 3]
+        first, second = [c[1]['params'] for c in self.get.call_args_list]
+        assert first == {'q': 'topic:x', 'n': 2}
+        assert second == {'q': 'topic:x', 'n': 2, 'S': 2}
+        assert (self.get.call_args[0][0] ==
+                'https://review.example.com/changes/')
+
+    def test_get_changes_batches(self):
+        self.get.side_effect = lambda url, params, headers: make_response(
+            '[%s]' % ', '.join(
+                '{"_number": %s}' % term.split(':')[1]
+                for term in params['q'].split(' OR ')))
+        changes = gerrit.get_changes('https://review.example.com',
+                                     iter(['1', '2', '3']), batch_size=2)
+        assert [change['_number'] for change in changes] == [1, 2, 3]
+        queries = [c[1]['params']['q'] for c in self.get.call_args_list]
+        assert queries == ['change:1 OR change:2', 'change:3']
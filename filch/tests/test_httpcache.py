@@ -0,0 +1,78 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import httpcache
+
+
+def make_response(status_code=200, body='{"name": "x"}', headers=None):
+    response = mock.MagicMock(status_code=status_code, text=body,
+                              headers=headers or {})
+    response.json.return_value = {'name': 'x'}
+    return response
+
+
+class TestHTTPCache(object):
+
+    def setup_method(self):
+        self.cache = httpcache.HTTPCache(':memory:', max_size=30)
+        self.patcher = mock.patch('filch.transport.get_session')
+        self.get = self.patcher.start().return_value.get
+
+    def teardown_method(self):
+        self.patcher.stop()
+        self.cache.close()
+
+    def test_revalidate(self):
+        self.get.return_value = make_response(headers={'ETag': '"v1"'})
+        assert self.cache.get_json('https://example.com/a',
+                                   {'b': 1}) == {'name': 'x'}
+        assert self.get.call_args[1]['headers'] == {}
+        assert self.get.call_args[0][0] == 'https://example.com/a?b=1'
+
+        self.get.return_value = make_response(304, body='')
+        assert self.cache.get_json('https://example.com/a',
+                                   {'b': 1}) == {'name': 'x'}
+        assert self.get.call_args[1]['headers'] == {'If-None-Match': '"v1"'}
+        assert self.cache.stats() == {'hits': 1, 'misses': 1}
+
+    def test_not_cacheable(self):
+        self.get.return_value = make_response()
+        self.cache.get_json('https://example.com/a')
+        self.cache.get_json('https://example.com/a')
+        assert self.get.call_args[1]['headers'] == {}
+
+    def test_evict_least_recently_used(self):
+        self.get.return_value = make_response(
+            headers={'Last-Modified': 'Fri, 02 Nov 2018 10:00:00 GMT'})
+        # each body is 13 bytes, only two fit
+        self.cache.get_json('https://example.com/1')
+        self.cache.get_json('https://example.com/2')
+        self.get.return_value = make_response(304, body='')
+        self.cache.get_json('https://example.com/1')
+        self.get.return_value = make_response(
+            headers={'Last-Modified': 'Fri, 02 Nov 2018 10:00:00 GMT'})
+        self.cache.get_json('https://example.com/3')
+
+        assert self.cache._lookup('https://example.com/1') is not None
+        assert self.cache._lookup('https://example.com/2') is None
+        assert self.cache._lookup('https://example.com/3') is not None
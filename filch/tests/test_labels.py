@@ -0,0 +1,71 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import data
+from filch import labels
+
+
+def make_label(name, color, label_id=None):
+    label = mock.MagicMock(id=label_id or name, color=color)
+    label.name = name
+    return label
+
+
+class TestLabelIndex(object):
+
+    def setup_method(self):
+        self.index = labels.LabelIndex([
+            make_label('Queens (Queens)', 'sky'),
+            make_label('Rocky (Rocky)', 'sky'),
+            make_label('High', 'blue'),
+            make_label('Bug', 'black'),
+            make_label('Bug', None, 'plain-bug')])
+
+    def test_lookups(self):
+        assert self.index.get('BLUE', 'high').name == 'High'
+        assert self.index.get('red', 'high') is None
+        assert self.index.get('null', 'bug').id == 'plain-bug'
+        assert self.index.get(None, 'bug').id == 'plain-bug'
+        assert [label.id for label in self.index.named('bug')] == [
+            'Bug', 'plain-bug']
+        assert [label.id for label in self.index.match(['Bug', 'bug'])] == [
+            'Bug', 'plain-bug']
+        assert self.index.release_labels('Queens', 'high') == [
+            'Queens (Queens)', 'High']
+
+    def test_add(self):
+        self.index.add(make_label('Stein (Stein)', 'sky'))
+        assert self.index.release_labels('Stein', 'low') == ['Stein (Stein)']
+        assert len(self.index) == 6
+        assert labels.LabelIndex.of(self.index) is self.index
+
+    def test_blueprint_create_card(self):
+        source = data.ManualBlueprintSource('tripleo', [])
+        card_data = source.create_card({
+            'milestone_link': 'https://launchpad/tripleo/+milestone/queens-1',
+            'priority': 'High', 'summary': '', 'web_link': '',
+            'specification_url': '', 'assignee_link': '',
+            'lifecycle_status': '', 'definition_status': '', 'name': 'x',
+            'title': 'x', 'is_complete': False, 'is_started': False},
+            self.index)
+        assert card_data['labels'] == ['Queens (Queens)', 'High']
@@ -0,0 +1,78 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import launchpad
+
+
+API = launchpad.constants.LAUNCHPAD_API_URL
+
+
+def task(bug_id, milestone=None):
+    return {
+        'status': 'New',
+        'importance': 'High',
+        'bug_link': '%s/bugs/%s' % (API, bug_id),
+        'milestone_link': milestone and '%s/tripleo/+milestone/%s' % (
+            API, milestone),
+    }
+
+
+class TestTaskSearch(object):
+
+    def setup_method(self):
+        self.pages = {
+            0: {'total_size': 5, 'entries': [task(1, 'stein-1'),
+                                             task(2, 'stein-1')]},
+            2: {'entries': [task(3, 'stein-2'), task(4)]},
+            4: {'entries': [task(5, 'stein-1')]},
+        }
+        self.requests = []
+
+    def get_json(self, url, params=None):
+        self.requests.append(url)
+        if params is not None:
+            assert params['ws.op'] == 'searchTasks'
+            assert params['status'] == ['New', 'Triaged']
+            assert params['omit_duplicates'] == 'true'
+            return self.pages[params['ws.start']]
+        if '/bugs/' in url:
+            return {'id': int(url.split('/')[-1]), 'title': 'bug'}
+        return {'name': url.split('/')[-1]}
+
+    def test_search(self):
+        search = launchpad.TaskSearch(
+            'tripleo', {'status': ['New', 'Triaged'],
+                        'omit_duplicates': True},
+            page_size=2, concurrency=3)
+        with mock.patch.object(launchpad, 'get_json', self.get_json):
+            tasks = list(search)
+
+        assert [t.bug.id for t in tasks] == [1, 2, 3, 4, 5]
+        assert tasks[0].milestone.name == 'stein-1'
+        assert tasks[3].milestone is None
+        assert tasks[0].importance == 'High'
+        milestone_requests = [url for url in self.requests
+                              if '+milestone' in url]
+        assert sorted(milestone_requests) == [
+            '%s/tripleo/+milestone/stein-1' % API,
+            '%s/tripleo/+milestone/stein-2' % API]
@@ -0,0 +1,112 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from filch import metrics
+
+
+class TestMetrics(object):
+
+    def setup_method(self):
+        self.metrics = metrics.Metrics(buckets=(0.1, 1))
+        self.tmpdir = tempfile.mkdtemp()
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_classify(self):
+        assert metrics.classify(
+            'put', 'https://api.trello.com/1/cards/5a1b2c3d4e5f6a7b8c9d0e1f'
+            '?key=abc') == ('trello', 'PUT /1/cards/{id}')
+        assert metrics.classify(
+            'GET', 'https://bugzilla.redhat.com/xmlrpc.cgi') == (
+            'bugzilla', 'GET /xmlrpc.cgi')
+        assert metrics.classify(
+            'GET', 'https://api.launchpad.net/devel/tripleo/+spec/my-spec') == (
+            'launchpad', 'GET /devel/tripleo/+spec/{id}')
+        assert metrics.classify(
+            'GET', 'https://review.openstack.org/changes/12345/detail') == (
+            'gerrit', 'GET /changes/{id}/detail')
+
+    def test_record(self):
+        self.metrics.record('trello', 'GET /1/boards/{id}', 0.05, 100)
+        self.metrics.record('trello', 'GET /1/boards/{id}', 0.5, 50)
+        self.metrics.record('trello', 'GET /1/boards/{id}', 5, 0, error=True)
+        self.metrics.retry('trello', 'GET /1/boards/{id}')
+        data = self.metrics.to_json()['requests'][0]
+        assert data['requests'] == 3
+        assert data['errors'] == 1
+        assert data['retries'] == 1
+        assert data['bytes'] == 150
+        assert data['histogram'] == [['0.1', 1], ['1', 2], ['+Inf', 3]]
+
+    def test_phase(self):
+        with self.metrics.phase('query', 'BugzillaURISource'):
+            pass
+        with self.metrics.phase('query', 'BugzillaURISource'):
+            pass
+        phases = self.metrics.to_json()['phases']
+        assert len(phases) == 1
+        assert phases[0]['phase'] == 'query'
+        assert phases[0]['count'] == 2
+        assert 'query (BugzillaURISource)' in self.metrics.summary()
+
+    def test_prometheus(self):
+        self.metrics.record('trello', 'GET /1/boards/{id}', 0.05, 100)
+        with self.metrics.phase('create'):
+            pass
+        text = self.metrics.to_prometheus()
+        assert ('filch_http_requests_total{backend="trello",'
+                'endpoint="GET /1/boards/{id}"} 1') in text
+        assert ('filch_http_request_duration_seconds_bucket{backend="trello",'
+                'endpoint="GET /1/boards/{id}",le="+Inf"} 1') in text
+        assert 'filch_phase_seconds_total{phase="create",detail=""}' in text
+
+    def test_write(self):
+        self.metrics.record('trello', 'GET /1/boards/{id}', 0.05, 100)
+        path = os.path.join(self.tmpdir, 'filch.json')
+        self.metrics.write(path)
+        with open(path) as json_file:
+            assert json.load(json_file)['requests'][0]['requests'] == 1
+        path = os.path.join(self.tmpdir, 'filch.prom')
+        self.metrics.write(path)
+        with open(path) as prom_file:
+            assert prom_file.read().startswith('# HELP')
+        # nothing is left behind by the atomic writes
+        assert sorted(os.listdir(self.tmpdir)) == ['filch.json', 'filch.prom']
+
+    def test_record_response(self):
+        response = mock.Mock(status_code=404, content=b'missing',
+                             url='https://api.trello.com/1/boards/abc')
+        response.request.method = 'GET'
+        response.elapsed.total_seconds.return_value = 0.2
+        with mock.patch.object(metrics, '_metrics', self.metrics):
+            metrics.record_response(response)
+        data = self.metrics.to_json()['requests'][0]
+        assert data['backend'] == 'trello'
+        assert data['errors'] == 1
+        assert data['bytes'] == 7
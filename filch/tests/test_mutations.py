@@ -0,0 +1,61 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import mutations
+
+
+class TestCardMutation(object):
+
+    def setup_method(self):
+        self.card = mock.MagicMock(id='card', desc='text', idList='list1',
+                                   idLabels=['a', 'b'])
+        self.card.name = 'name'
+        self.fetch_json = self.card.client.fetch_json
+
+    def test_unchanged(self):
+        mutation = mutations.CardMutation(self.card)
+        mutation.set('name', 'name')
+        mutation.set('desc', 'text')
+        mutation.set('idLabels', ['b', 'a'])
+        mutation.set_custom_field('field', {'text': 'x'}, {'text': 'x'})
+        assert not mutation.changed
+        assert mutation.apply() == 0
+        assert not self.fetch_json.called
+
+    def test_single_put(self):
+        mutation = mutations.CardMutation(self.card)
+        mutation.set('name', 'name')
+        mutation.set('idList', 'list2')
+        mutation.set('idLabels', ['a'])
+        mutation.set_custom_field('field', {'text': 'x'})
+
+        assert mutation.apply() == 2
+        card_call, fields_call = self.fetch_json.call_args_list
+        assert card_call[0][0] == '/cards/card'
+        assert card_call[1]['post_args'] == {'idList': 'list2',
+                                             'idLabels': 'a'}
+        assert fields_call[0][0] == '/cards/card/customFields'
+        assert fields_call[1]['post_args'] == {'customFieldItems': [
+            {'idCustomField': 'field', 'value': {'text': 'x'}}]}
+        assert self.card.idList == 'list2'
+        assert self.card.idLabels == ['a']
@@ -0,0 +1,71 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+
+from filch import pipeline
+
+
+class TestPipeline(object):
+
+    def test_run(self):
+        done = []
+        errors = []
+
+        def fetch(item):
+            if item == 3:
+                raise ValueError(item)
+            return item * 10
+
+        bulk = pipeline.Pipeline(
+            fetch, lambda value: value + 1, concurrency=4, window=2,
+            on_done=lambda item, result: done.append((item, result)),
+            on_error=lambda item, err: errors.append(item))
+
+        assert bulk.run(iter(range(10))) == 9
+        assert sorted(done) == [(i, i * 10 + 1) for i in range(10) if i != 3]
+        assert errors == [3]
+        assert bulk.failed == 1
+
+    def test_window(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def fetch(item):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            return item
+
+        def write(item):
+            with lock:
+                in_flight[0] -= 1
+
+        bulk = pipeline.Pipeline(fetch, write, concurrency=8, window=3)
+        bulk.run(range(50))
+        assert bulk.done == 50
+        assert in_flight[1] <= 3
+
+    def test_prefetched(self):
+        written = []
+        bulk = pipeline.Pipeline(None, written.append, concurrency=2)
+        assert bulk.run(['a', 'b']) == 2
+        assert sorted(written) == ['a', 'b']
@@ -0,0 +1,188 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import mock
+
+from filch import data
+from filch import planner
+
+
+bz_config = {
+    'url': 'https://bugzilla.example.com/xmlrpc.cgi',
+    'user': 'user',
+    'password': 'password',
+    'sslverify': True,
+}
+
+
+class FakeSource(object):
+
+    def __init__(self, results, labels):
+        self.results = results
+        self.labels = labels
+
+    def query(self):
+        return self.results
+
+    def get_labels(self, results):
+        return {'blue': list(self.labels)}
+
+    def sort_card(self, result):
+        return 'New'
+
+    def create_card(self, result, labels):
+        return {'name': result, 'source': 'https://Example.com/%s/' % result,
+                'labels': list(self.labels)}
+
+
+def test_canonical_url():
+    assert (planner.canonical_url('HTTPS://Bugs.Example.com/1234/') ==
+            'https://bugs.example.com/1234')
+    assert planner.canonical_url(None) == ''
+
+
+def plan_all(plan):
+    # the way BoardManager drives a plan
+    items = []
+    for source, results in plan.start():
+        items.extend(plan.add(source, results, []))
+    items.extend(plan.release())
+    return items
+
+
+class TestSyncPlan(object):
+
+    def test_merge_by_source(self):
+        first = FakeSource(['a', 'b'], ['one'])
+        second = FakeSource(['b', 'c'], ['two'])
+        plan = planner.SyncPlan([first, second])
+
+        items = plan_all(plan)
+
+        assert sorted(item.result for item in items) == ['a', 'b', 'c']
+        merged, = [item for item in items if item.result == 'b']
+        assert set(merged.sources) == {first, second}
+        assert sorted(merged.card_data['labels']) == ['one', 'two']
+
+    @mock.patch.object(data.BugzillaURISource, 'get_client')
+    def test_combined_bugzilla(self, get_client):
+        client = get_client.return_value
+        client.url_to_query.side_effect = lambda uri: {'uri': uri}
+        client.query.side_effect = [
+            [mock.MagicMock(id=1), mock.MagicMock(id=2)],
+            [mock.MagicMock(id=2), mock.MagicMock(id=3)]]
+        bugs = {bug_id: mock.MagicMock(id=bug_id) for bug_id in (1, 2, 3)}
+        client.getbugs.side_effect = lambda ids, include_fields: [
+            bugs[int(bug_id)] for bug_id in ids]
+        first = data.BugzillaURISource(bz_config, 'first', ['id', 'status'])
+        second = data.BugzillaURISource(bz_config, 'second', ['id', 'version'])
+        plan = planner.SyncPlan([first, second])
+
+        list(plan.start())
+
+        assert plan.results[first] == [bugs[1], bugs[2]]
+        assert plan.results[second] == [bugs[2], bugs[3]]
+        for call in client.query.call_args_list:
+            assert call[0][0]['include_fields'] == ['id']
+        client.getbugs.assert_called_once_with(
+            ['1', '2', '3'], include_fields=mock.ANY)
+        include_fields = client.getbugs.call_args[1]['include_fields']
+        assert {'status', 'version'} <= set(include_fields)
+
+    def test_streamed_with_timeout(self):
+        release = threading.Event()
+        fast = FakeSource(['a'], ['one'])
+        slow = FakeSource(['a'], ['two'])
+        slow.query = lambda: release.wait(5) and ['a']
+        slow.timeout = 0.1
+        plan = planner.SyncPlan([slow, fast])
+
+        items = plan_all(plan)
+        release.set()
+
+        assert list(plan.results.keys()) == [fast]
+        assert plan.timed_out == [slow]
+        # held for the slow source, released once it was abandoned
+        assert [item.card_data['labels'] for item in items] == [['one']]
+
+    def test_abandoned_query_does_not_delay_exit(self):
+        script = textwrap.dedent("""
+            import time
+            from filch import planner
+
+            class Slow(object):
+                timeout = 0.1
+
+                def query(self):
+                    time.sleep(30)
+
+            list(planner.SyncPlan([Slow()]).start())
+        """)
+        started = time.time()
+        subprocess.check_call([sys.executable, '-c', script], cwd=os.path.dirname(
+            os.path.dirname(planner.__file__)))
+        assert time.time() - started < 15
+
+    def test_held_until_sources_report(self):
+        first = FakeSource(['a'], ['one'])
+        second = FakeSource(['a', 'b'], ['one', 'two'])
+        plan = planner.SyncPlan([first, second])
+
+        plan.results[first] = ['a']
+        # the second source may return the same artifact
+        assert plan.add(first, ['a'], []) == []
+        plan.results[second] = ['a', 'b']
+        items = plan.add(second, ['a', 'b'], [])
+
+        assert [item.result for item in items] == ['a', 'b']
+        assert items[0].source is first
+        assert items[0].card_data['labels'] == ['one', 'two']
+        assert plan.add(second, ['a'], []) == []
+
+    def test_released_when_no_source_may_return(self):
+        first = FakeSource(['a'], ['one'])
+        other = FakeSource([], [])
+        other.may_return = lambda url: 'other.example.com' in url
+        plan = planner.SyncPlan([first, other])
+
+        plan.results[first] = ['a']
+        item, = plan.add(first, ['a'], [])
+        assert item.result == 'a'
+        assert plan.release() == []
+
+    def test_merge_keeps_card_data(self):
+        first = FakeSource(['a'], ['one'])
+        second = FakeSource(['a'], ['two'])
+        item = planner.PlannedCard(first, 'a', first.create_card('a', []),
+                                   'New')
+        card_data = item.card_data
+        assert item.merge(second, second.create_card('a', []))
+        assert item.card_data['labels'] == ['one', 'two']
+        # the card data handed out before the merge is left alone
+        assert card_data['labels'] == ['one']
+        assert not item.merge(second, second.create_card('a', []))
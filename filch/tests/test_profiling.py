@@ -0,0 +1,93 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+
+import click
+from click import testing
+import mock
+
+from filch import metrics
+from filch import profiling
+
+
+def busy():
+    return sum(i * i for i in range(1000))
+
+
+class TestProfiler(object):
+
+    def setup_method(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'filch.prof')
+
+    def teardown_method(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_profile(self):
+        response = mock.Mock(
+            status_code=200, content=b'{}',
+            url='https://api.trello.com/1/boards/abc?key=k&token=t')
+        response.request.method = 'GET'
+        response.elapsed.total_seconds.return_value = 0.1
+
+        with profiling.Profiler(self.path):
+            thread = threading.Thread(target=busy)
+            thread.start()
+            thread.join()
+            with mock.patch.object(metrics, '_metrics', metrics.Metrics()):
+                metrics.record_response(response)
+
+        assert metrics._listeners == []
+        stats = pstats.Stats(self.path)
+        assert any(func[2] == 'busy' for func in stats.stats)
+        with open(self.path + '.txt') as report:
+            text = report.read()
+        assert 'peak' in text
+        assert 'Top allocations' in text
+        with open(self.path + '.http.jsonl') as trace:
+            calls = [json.loads(line) for line in trace]
+        assert len(calls) == 1
+        assert calls[0]['url'] == 'https://api.trello.com/1/boards/abc'
+        assert calls[0]['backend'] == 'trello'
+        assert calls[0]['status'] == 200
+
+    @mock.patch('filch.profiling.Profiler')
+    def test_option(self, mock_profiler):
+        @click.command()
+        @click.argument('name')
+        @profiling.profile_option
+        def command(name):
+            click.echo(name)
+
+        runner = testing.CliRunner()
+        result = runner.invoke(command, ['board'])
+        assert result.exit_code == 0
+        assert not mock_profiler.called
+
+        result = runner.invoke(command, ['board', '--profile', self.path])
+        assert result.exit_code == 0
+        mock_profiler.assert_called_once_with(self.path)
@@ -0,0 +1,59 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import ratelimit
+
+
+class TestThrottledHTTPService(object):
+
+    def setup_method(self):
+        self.http_service = mock.MagicMock()
+        self.bucket = ratelimit.TokenBucket(100, 10)
+
+    def test_request(self):
+        self.http_service.request.return_value = mock.MagicMock(
+            status_code=200)
+        service = ratelimit.ThrottledHTTPService(self.http_service,
+                                                 buckets=[self.bucket])
+        response = service.request('GET', 'https://example.com')
+        assert response.status_code == 200
+        assert self.bucket.tokens < 100
+
+    def test_retry_after(self):
+        throttled = mock.MagicMock(status_code=429,
+                                   headers={'Retry-After': '0'})
+        ok = mock.MagicMock(status_code=200)
+        self.http_service.request.side_effect = [throttled, ok]
+        service = ratelimit.ThrottledHTTPService(self.http_service,
+                                                 buckets=[self.bucket])
+        assert service.request('PUT', 'https://example.com') is ok
+        assert self.http_service.request.call_count == 2
+
+    def test_gives_up(self):
+        throttled = mock.MagicMock(status_code=429,
+                                   headers={'Retry-After': '0'})
+        self.http_service.request.return_value = throttled
+        service = ratelimit.ThrottledHTTPService(self.http_service,
+                                                 max_retries=2)
+        assert service.request('PUT', 'https://example.com') is throttled
+        assert self.http_service.request.call_count == 3
@@ -0,0 +1,111 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+import trello
+
+from filch import snapshot
+
+
+def card_json(card_id, list_id, source=None):
+    card = {
+        'id': card_id,
+        'name': 'card %s' % card_id,
+        'desc': '',
+        'due': None,
+        'dueComplete': False,
+        'closed': False,
+        'url': 'https://trello.com/c/%s' % card_id,
+        'pos': 1,
+        'shortUrl': 'https://trello.com/c/%s' % card_id,
+        'idMembers': [],
+        'idLabels': [],
+        'idBoard': 'board1',
+        'idList': list_id,
+        'idShort': 1,
+        'badges': {'checkItems': 0, 'comments': 0},
+        'idChecklists': [],
+        'labels': [],
+        'dateLastActivity': '2018-11-01T00:00:00.000Z',
+        'customFieldItems': [],
+    }
+    if source:
+        card['customFieldItems'].append({
+            'id': 'item-%s' % card_id,
+            'idCustomField': 'field1',
+            'value': {'text': source},
+        })
+    return card
+
+
+board_json = {
+    'id': 'board1',
+    'name': 'test-board',
+    'customFields': [
+        {'id': 'field1', 'name': 'source', 'type': 'text'},
+    ],
+    'lists': [
+        {'id': 'list1', 'name': 'Bugs', 'closed': False, 'pos': 1},
+        {'id': 'list2', 'name': 'Complete', 'closed': False, 'pos': 2},
+    ],
+    'labels': [
+        {'id': 'label1', 'name': 'Bug', 'color': 'black'},
+    ],
+    'checklists': [
+        {'id': 'cl1', 'name': 'External Trackers', 'idCard': 'card1',
+         'pos': 1, 'checkItems': []},
+    ],
+    'cards': [
+        card_json('card1', 'list1', source='https://example.com/1'),
+        card_json('card2', 'list2'),
+    ],
+}
+
+
+class TestBoardSnapshot(object):
+    def setup_method(self):
+        self.client = mock.MagicMock()
+        self.client.fetch_json.return_value = board_json
+        self.board = trello.Board(client=self.client, board_id='board1')
+
+    def test_single_request(self):
+        snapshot.BoardSnapshot(self.board)
+        assert self.client.fetch_json.call_count == 1
+
+    def test_indexes(self):
+        board_snapshot = snapshot.BoardSnapshot(self.board)
+        card = board_snapshot.cards_by_source['https://example.com/1']
+        assert card.id == 'card1'
+        assert board_snapshot.source_field_id == 'field1'
+        assert board_snapshot.get_list(card).name == 'Bugs'
+        assert board_snapshot.get_source(card) == 'https://example.com/1'
+        assert board_snapshot.get_source(
+            board_snapshot.cards_by_id['card2']) is None
+        assert [cl.name for cl in card.checklists] == ['External Trackers']
+        assert [label.name for label in board_snapshot.labels] == ['Bug']
+        assert self.client.fetch_json.call_count == 1
+
+    def test_add_card(self):
+        board_snapshot = snapshot.BoardSnapshot(self.board)
+        new_card = trello.Card(self.board, 'card3', 'card 3')
+        board_snapshot.add_card(new_card, 'https://example.com/3')
+        assert board_snapshot.cards_by_source[
+            'https://example.com/3'] is new_card
@@ -0,0 +1,77 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from filch import state
+
+
+card_data = {
+    'name': 'test card',
+    'description': 'test description',
+    'labels': ['Bug', 'High'],
+    'date_due': None,
+    'source': 'https://example.com/1',
+}
+
+
+class TestSyncState(object):
+
+    def setup_method(self):
+        self.state = state.SyncState(':memory:')
+
+    def teardown_method(self):
+        self.state.close()
+
+    def test_content_hash(self):
+        digest = state.SyncState.content_hash(card_data, 'Bugs')
+        assert digest == state.SyncState.content_hash(dict(card_data), 'Bugs')
+        assert digest != state.SyncState.content_hash(card_data, 'Complete')
+        assert digest != state.SyncState.content_hash(card_data, 'Bugs',
+                                                      {'comments': 2})
+        assert digest == state.SyncState.content_hash(
+            dict(card_data, labels=['High', 'Bug']), 'Bugs')
+
+    def test_put_and_get(self):
+        assert self.state.get('board1', card_data['source']) is None
+        self.state.put('board1', card_data['source'], 'card1', 'list1',
+                       card_data['labels'], 'abc')
+        record = self.state.get('board1', card_data['source'])
+        assert record['card_id'] == 'card1'
+        assert record['list_id'] == 'list1'
+        assert record['labels'] == ['Bug', 'High']
+        assert record['default_labels'] == []
+        assert self.state.is_current('board1', card_data['source'], 'abc')
+        assert not self.state.is_current('board1', card_data['source'], 'def')
+        assert not self.state.is_current('board2', card_data['source'], 'abc')
+
+    def test_default_labels(self):
+        self.state.put('board1', card_data['source'], 'card1', 'list1',
+                       card_data['labels'], 'abc', default_labels=['Bug'])
+        record = self.state.all('board1')[card_data['source']]
+        assert record['default_labels'] == ['Bug']
+
+    def test_forget(self):
+        self.state.put('board1', card_data['source'], 'card1')
+        self.state.put('board1', 'https://example.com/2', 'card2')
+        self.state.forget('board1', card_data['source'])
+        assert list(self.state.all('board1').keys()) == [
+            'https://example.com/2']
+        self.state.forget('board1')
+        assert self.state.all('board1') == {}
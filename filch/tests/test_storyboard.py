@@ -0,0 +1,68 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+
+from filch import storyboard
+
+
+def make_response(items, status_code=200):
+    return mock.MagicMock(status_code=status_code,
+                          json=mock.MagicMock(return_value=items))
+
+
+class TestStoryBoard(object):
+
+    def setup_method(self):
+        self.patcher = mock.patch('filch.transport.get_session')
+        self.get = self.patcher.start().return_value.get
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    def test_get_pages(self):
+        self.get.side_effect = [
+            make_response([{'id': 1}, {'id': 2}]),
+            make_response([{'id': 3}])]
+        items = list(storyboard.get_pages('stories', {'tags': ['x']},
+                                          page_size=2,
+                                          headers={'If-Modified-Since': 'x'}))
+        assert [item['id'] for item in items] == [1, 2, 3]
+        first, second = self.get.call_args_list
+        assert 'marker' not in first[1]['params']
+        assert second[1]['params']['marker'] == 2
+        assert second[1]['params']['limit'] == 2
+        # conditional headers only apply to the first page
+        assert first[1]['headers'] == {'If-Modified-Since': 'x'}
+        assert second[1]['headers'] is None
+
+    def test_not_modified(self):
+        self.get.return_value = make_response(None, 304)
+        assert list(storyboard.get_pages('stories')) == []
+
+    def test_task_statuses(self):
+        self.get.return_value = make_response([
+            {'id': 1, 'story_id': 10, 'status': 'todo'},
+            {'id': 2, 'story_id': 10, 'status': 'review'},
+            {'id': 3, 'story_id': 11, 'status': 'todo'}])
+        statuses = storyboard.get_task_statuses(5)
+        assert statuses[10] == {'todo': 1, 'review': 1}
+        assert self.get.call_count == 1
@@ -0,0 +1,51 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mock
+import requests
+
+from filch import transport
+
+
+class TestTransport(object):
+
+    def teardown_method(self):
+        transport.configure(pool_size=transport.constants.HTTP_POOL_SIZE,
+                            timeout=transport.constants.HTTP_TIMEOUT)
+
+    def test_shared_session(self):
+        assert transport.get_session() is transport.get_session()
+
+    def test_configure(self):
+        session = transport.get_session()
+        transport.configure(pool_size=2, timeout=[1, 2])
+        new_session = transport.get_session()
+        assert new_session is not session
+        assert new_session.timeout == (1, 2)
+        assert new_session.get_adapter('https://example.com')._pool_maxsize == 2
+
+    def test_default_timeout(self):
+        session = transport.Session(timeout=5)
+        with mock.patch.object(requests.Session, 'request') as mock_request:
+            session.request('GET', 'https://example.com')
+            session.request('GET', 'https://example.com', timeout=1)
+        assert mock_request.call_args_list[0][1]['timeout'] == 5
+        assert mock_request.call_args_list[1][1]['timeout'] == 1
@@ -0,0 +1,92 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2018 Ryan Brady <ryan@ryanbrady.org>
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+
+import requests
+from requests import adapters
+
+from filch import constants
+from filch import metrics
+
+
+class Session(requests.Session):
+    """ requests Session with keep-alive pools and a default timeout """
+
+    def __init__(self, pool_size=constants.HTTP_POOL_SIZE,
+                 timeout=constants.HTTP_TIMEOUT):
+        super(Session, self).__init__()
+        self.timeout = timeout
+        # pool_connections is the number of hosts to cache pools for,
+        # pool_maxsize the number of connections kept alive per host
+        adapter = adapters.HTTPAdapter(pool_connections=pool_size,
+                                       pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        # every response is counted by backend and endpoint
+        self.hooks['response'].append(metrics.record_response)
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super(Session, self).request(method, url, **kwargs)
+
+
+_settings = {
+    'pool_size': constants.HTTP_POOL_SIZE,
+    'timeout': constants.HTTP_TIMEOUT,
+}
+_session = None
+_lock = threading.Lock()
+
+
+def configure(pool_size=None, timeout=None):
+    """ Change the settings used for the shared session
+
+    Replaces the shared session, so it should be called before any
+    requests are made.
+
+    :param pool_size: connections kept alive per host
+    :param timeout: default timeout in seconds, or a (connect, read) tuple
+    :return: None
+    """
+    global _session
+    with _lock:
+        if pool_size is not None:
+            _settings['pool_size'] = pool_size
+        if timeout is not None:
+            _settings['timeout'] = (tuple(timeout)
+                                    if isinstance(timeout, list) else timeout)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    """ Returns the process-wide HTTP session
+
+    :return: Session
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = Session(**_settings)
+        return _session
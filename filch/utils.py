@@ -19,35 +19,31 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-import bugzilla
-from launchpadlib.launchpad import Launchpad
-import requests
-
+from filch import clients
 from filch import constants
+from filch import httpcache
 
 
 def get_blueprint(project, blueprint):
     url = 'https://api.launchpad.net/devel/{project}/+spec/{blueprint}'
-    r = requests.get(
+    return httpcache.get_json(
         url.format(project=project, blueprint=blueprint))
-    return r.json()
 
 
 def get_launchpad_bug(bug_id):
     url = 'https://api.launchpad.net/devel/bugs/%s'
-    r = requests.get(url % bug_id)
-    return r.json()
+    return httpcache.get_json(url % bug_id)
 
 
 def add_tags_to_launchpad_bug(bug_id, tags):
-    launchpad = Launchpad.login_with('Filch', 'production', version='devel')
+    launchpad = clients.get_launchpad()
     bug = launchpad.bugs[bug_id]
     bug.tags = bug.tags + tags
     bug.lp_save()
 
 
 def remove_tags_from_launchpad_bug(bug_id, tags):
-    launchpad = Launchpad.login_with('Filch', 'production', version='devel')
+    launchpad = clients.get_launchpad()
     bug = launchpad.bugs[bug_id]
     for tag in tags:
         bug.tags.remove(tag)
@@ -57,8 +53,7 @@ def remove_tags_from_launchpad_bug(bug_id, tags):
 
 def get_storyboard_story(story_id):
     url = 'https://storyboard.openstack.org/api/v1/stories/%s' % story_id
-    r = requests.get(url)
-    story = r.json()
+    story = httpcache.get_json(url)
     story['story_url'] = (
             'https://storyboard.openstack.org/#!/story/%s' %
             story_id)
@@ -66,11 +61,9 @@ def get_storyboard_story(story_id):
 
 
 def get_bz(bz_id, **kwargs):
-    bz4 = bugzilla.Bugzilla44(
-        url=kwargs['url'],
-        user=kwargs['user'], password=kwargs['password'],
-        sslverify=kwargs['sslverify']
-    )
+    bz4 = clients.get_bugzilla(
+        kwargs['url'], kwargs['user'], kwargs['password'],
+        sslverify=kwargs['sslverify'])
 
     return bz4.getbug(bz_id)
 